@@ -5,54 +5,91 @@ Handles environment-specific configuration loading and validation
 """
 
 import os
-import json
+import re
 import logging
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Any
 from dotenv import load_dotenv
-import jsonschema
+import fastjsonschema
+import orjson
+
+# Environment variables that may override configuration file values
+ENV_VAR_KEYS = (
+    'SERVER_HOST',
+    'SERVER_PORT',
+    'DEBUG_MODE',
+    'OPENAI_API_KEY',
+    'OPENAI_MODEL',
+    'REDIS_URL',
+    'LOG_LEVEL',
+    'SECRET_KEY',
+    'CORS_ALLOWED_ORIGINS',
+    'RATE_LIMIT_PER_MINUTE',
+    'DATABASE_URL',
+    'ENABLE_METRICS',
+)
+
+# Marker for keys that resolved to nothing, so misses can be cached too
+_MISSING = object()
+
+# Lookup tables for converting environment variable strings to Python values
+_BOOL_VALUES = {'true': True, 'false': False}
+_INT_RE = re.compile(r'-?[0-9]+')
+_FLOAT_RE = re.compile(r'[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?')
+
+# Compiled schema validators keyed by path, reused across ConfigManager instances until the
+# schema's mtime changes. Config files are small and parsed fresh with orjson on every load,
+# which is cheaper than handing out deep copies of a cached parse.
+_validator_cache: dict[Path, tuple[float, Any]] = {}
 
 class ConfigurationError(Exception):
     """Raised when configuration is invalid or missing"""
     pass
 
+def _get_schema_validator(schema_path: Path) -> Any:
+    """Compile the schema into a validation function once and reuse it while its mtime is unchanged"""
+    mtime = schema_path.stat().st_mtime
+    cached = _validator_cache.get(schema_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    schema = orjson.loads(schema_path.read_bytes())
+    validate = fastjsonschema.compile(schema, use_default=False)
+    _validator_cache[schema_path] = (mtime, validate)
+    return validate
+
 class ConfigManager:
     """Environment-aware configuration manager"""
     
-    def __init__(self, environment: Optional[str] = None):
+    def __init__(self, environment: str | None = None):
         self.environment = environment or os.getenv('NODE_ENV', 'development')
         self.config_dir = Path(__file__).parent / 'environments'
         self.schema_path = Path(__file__).parent / 'config_schema.json'
-        self._config: Dict[str, Any] = {}
-        self._env_vars: Dict[str, str] = {}
+        self._config: dict[str, Any] = {}
+        self._flat: dict[str, Any] = {}
+        self._env_vars: dict[str, str] = {}
+        self._get_cache: dict[str, Any] = {}
         
         # Load configuration
         self._load_environment_variables()
         self._load_config_file()
         self._validate_configuration()
+    
+    def reload(self):
+        """Reload environment variables and configuration file, dropping cached lookups"""
+        self._get_cache.clear()
+        self._load_environment_variables()
+        self._load_config_file()
+        self._validate_configuration()
         
     def _load_environment_variables(self):
         """Load environment variables from .env file and system"""
         load_dotenv()
         
-        # Get all relevant environment variables
-        env_vars = {
-            'SERVER_HOST': os.getenv('SERVER_HOST'),
-            'SERVER_PORT': os.getenv('SERVER_PORT'),
-            'DEBUG_MODE': os.getenv('DEBUG_MODE'),
-            'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY'),
-            'OPENAI_MODEL': os.getenv('OPENAI_MODEL'),
-            'REDIS_URL': os.getenv('REDIS_URL'),
-            'LOG_LEVEL': os.getenv('LOG_LEVEL'),
-            'SECRET_KEY': os.getenv('SECRET_KEY'),
-            'CORS_ALLOWED_ORIGINS': os.getenv('CORS_ALLOWED_ORIGINS'),
-            'RATE_LIMIT_PER_MINUTE': os.getenv('RATE_LIMIT_PER_MINUTE'),
-            'DATABASE_URL': os.getenv('DATABASE_URL'),
-            'ENABLE_METRICS': os.getenv('ENABLE_METRICS'),
-        }
-        
-        # Filter out None values
-        self._env_vars = {k: v for k, v in env_vars.items() if v is not None}
+        # Pick the relevant variables straight out of the environment mapping
+        env = os.environ
+        self._env_vars = {k: env[k] for k in ENV_VAR_KEYS if k in env}
         
     def _load_config_file(self):
         """Load configuration from environment-specific JSON file"""
@@ -62,9 +99,9 @@ class ConfigManager:
             raise ConfigurationError(f"Configuration file not found: {config_file}")
         
         try:
-            with open(config_file, 'r') as f:
-                self._config = json.load(f)
-        except json.JSONDecodeError as e:
+            self._config = orjson.loads(config_file.read_bytes())
+            self._flat = self._flatten(self._config)
+        except orjson.JSONDecodeError as e:
             raise ConfigurationError(f"Invalid JSON in configuration file {config_file}: {e}")
         except Exception as e:
             raise ConfigurationError(f"Failed to load configuration file {config_file}: {e}")
@@ -76,67 +113,77 @@ class ConfigManager:
             return
         
         try:
-            with open(self.schema_path, 'r') as f:
-                schema = json.load(f)
-            
-            jsonschema.validate(self._config, schema)
+            validate = _get_schema_validator(self.schema_path)
+            validate(self._config)
             logging.info("Configuration validation passed")
             
-        except jsonschema.ValidationError as e:
+        except fastjsonschema.JsonSchemaValueException as e:
             raise ConfigurationError(f"Configuration validation failed: {e.message}")
         except Exception as e:
             logging.warning(f"Failed to validate configuration: {e}")
     
     def get(self, key: str, default: Any = None, required: bool = False) -> Any:
         """Get configuration value with environment variable override"""
-        # Check for environment variable override first
-        env_key = key.upper().replace('.', '_')
-        if env_key in self._env_vars:
-            value = self._env_vars[env_key]
-            # Convert string values to appropriate types
-            return self._convert_value(value)
+        value = self._get_cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._resolve(key)
+            self._get_cache[key] = value
         
-        # Get from nested config using dot notation
-        value = self._get_nested(self._config, key.split('.'), default)
+        if value is _MISSING:
+            value = default
         
         if required and value is None:
             raise ConfigurationError(f"Required configuration key '{key}' not found")
         
         return value
     
-    def _get_nested(self, config: Dict[str, Any], keys: list, default: Any) -> Any:
-        """Get nested configuration value using dot notation"""
-        current = config
-        for key in keys:
-            if isinstance(current, dict) and key in current:
-                current = current[key]
-            else:
-                return default
-        return current
+    def _resolve(self, key: str) -> Any:
+        """Resolve a key from environment overrides or the config file, uncached"""
+        # Check for environment variable override first
+        env_key = key.upper().replace('.', '_')
+        if env_key in self._env_vars:
+            # Convert string values to appropriate types
+            return self._convert_value(self._env_vars[env_key])
+        
+        # Get from the flattened config using dot notation
+        return self._flat.get(key, _MISSING)
+    
+    def _flatten(self, config: dict[str, Any], prefix: str = '') -> dict[str, Any]:
+        """Index every nested value (including sub-objects) by its dotted key"""
+        flat = {}
+        for key, value in config.items():
+            dotted = f"{prefix}.{key}" if prefix else key
+            flat[dotted] = value
+            if isinstance(value, dict):
+                flat.update(self._flatten(value, dotted))
+        return flat
     
     def _convert_value(self, value: str) -> Any:
         """Convert string environment variable to appropriate type"""
-        if value.lower() in ('true', 'false'):
-            return value.lower() == 'true'
+        lowered = value.lower()
+        if lowered in _BOOL_VALUES:
+            return _BOOL_VALUES[lowered]
         
-        if value.isdigit():
+        if _INT_RE.fullmatch(value):
             return int(value)
         
-        try:
+        if _FLOAT_RE.fullmatch(value):
             return float(value)
+        try:
+            return float(value)  # Forms the fast path skips: ' 1.5', 'inf', 'nan', '1_000.5'
         except ValueError:
             pass
         
         # Handle JSON arrays/objects
-        if value.startswith('[') or value.startswith('{'):
+        if value[:1] in ('[', '{'):
             try:
-                return json.loads(value)
-            except json.JSONDecodeError:
+                return orjson.loads(value)
+            except orjson.JSONDecodeError:
                 pass
         
         return value
     
-    def get_server_config(self) -> Dict[str, Any]:
+    def get_server_config(self) -> dict[str, Any]:
         """Get server-specific configuration"""
         return {
             'host': self.get('server.host', '0.0.0.0'),
@@ -146,7 +193,7 @@ class ConfigManager:
             'max_upload_size_mb': self.get('server.max_upload_size_mb', 10)
         }
     
-    def get_logging_config(self) -> Dict[str, Any]:
+    def get_logging_config(self) -> dict[str, Any]:
         """Get logging configuration"""
         return {
             'level': self.get('logging.level', 'INFO'),
@@ -156,7 +203,7 @@ class ConfigManager:
             'log_file': self.get('logging.log_file', 'app.log')
         }
     
-    def get_security_config(self) -> Dict[str, Any]:
+    def get_security_config(self) -> dict[str, Any]:
         """Get security configuration"""
         return {
             'rate_limit_per_minute': self.get('security.rate_limit_per_minute', 60),
@@ -166,7 +213,7 @@ class ConfigManager:
             'force_https': self.get('security.force_https', False)
         }
     
-    def get_mcp_config(self) -> Dict[str, Any]:
+    def get_mcp_config(self) -> dict[str, Any]:
         """Get MCP configuration"""
         return {
             'health_check_interval': self.get('mcp.health_check_interval', 30),
@@ -192,11 +239,11 @@ class ConfigManager:
         required_vars = []
         
         if self.get('features.enable_ai_features', True):
-            if not os.getenv('OPENAI_API_KEY'):
+            if not self._env_vars.get('OPENAI_API_KEY'):
                 required_vars.append('OPENAI_API_KEY')
         
         if self.is_production():
-            if not os.getenv('SECRET_KEY'):
+            if not self._env_vars.get('SECRET_KEY'):
                 required_vars.append('SECRET_KEY')
         
         if required_vars:
@@ -209,17 +256,25 @@ class ConfigManager:
         return f"ConfigManager(environment={self.environment})"
 
 # Global configuration instance
-config_manager: Optional[ConfigManager] = None
+config_manager: ConfigManager | None = None
+_config_lock = threading.Lock()
 
 def get_config() -> ConfigManager:
     """Get global configuration manager instance"""
     global config_manager
-    if config_manager is None:
-        config_manager = ConfigManager()
-    return config_manager
+    manager = config_manager
+    if manager is not None:
+        return manager
+    
+    # Slow path: first use, build the instance exactly once across threads
+    with _config_lock:
+        if config_manager is None:
+            config_manager = ConfigManager()
+        return config_manager
 
-def init_config(environment: Optional[str] = None) -> ConfigManager:
+def init_config(environment: str | None = None) -> ConfigManager:
     """Initialize global configuration manager"""
     global config_manager
-    config_manager = ConfigManager(environment)
-    return config_manager
\ No newline at end of file
+    with _config_lock:
+        config_manager = ConfigManager(environment)
+        return config_manager
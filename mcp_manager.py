@@ -4,110 +4,238 @@ Provides dynamic loading, health monitoring, and runtime management of MCP serve
 """
 
 import json
+import random
+import re
+import sched
+import selectors
+import signal
 import subprocess
 import time
 import threading
 import logging
 import os
 import socket
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, field
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from itertools import count, groupby
+from typing import Any
+from dataclasses import dataclass, field, replace
 from enum import Enum
+from functools import lru_cache, partial
 import jsonschema
 from langchain.tools import Tool
 from fastmcp import Client
 from mcp_validator import MCPConfigValidator
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Static validation result for the most recently loaded config revision, as
+# ((config key, schema abspath), result); a single slot, so an unchanged file is not
+# revalidated on every load and superseded revisions are not kept around
+_last_validation: tuple[tuple[tuple[str, int, int], str], dict[str, Any]] | None = None
+
+def _config_revision_key(config_path: str) -> tuple[str, int, int]:
+    """Identify a config file revision by path, modification time and size"""
+    st = os.stat(config_path)
+    return (os.path.abspath(config_path), st.st_mtime_ns, st.st_size)
+
+def _read_config_revision(config_path: str) -> tuple[tuple[str, int, int], dict[str, Any]]:
+    """Return a config file's revision key, taken before reading, and its freshly parsed contents"""
+    key = _config_revision_key(config_path)
+    with open(config_path, 'r') as f:
+        return key, json.load(f)
+
+def read_mcp_config(config_path: str = "mcp_config.json") -> dict[str, Any]:
+    """Read an MCP configuration file"""
+    return _read_config_revision(config_path)[1]
+
+def _invoke_tool(manager: "MCPManager", server: "MCP_Server", name: str, **kwargs) -> str:
+    """Call an MCP tool by name, cold-starting an idle server first; bound per tool with functools.partial"""
+    with server._calls_lock:
+        server.in_flight += 1  # Counted before the checks below, so an idle stop cannot slip in between
+    try:
+        # Wait out a start or idle stop in progress rather than calling a half-connected client
+        if not server.ready.wait(STARTUP_WAIT_TIMEOUT):
+            raise TimeoutError(f"server '{server.id}' did not finish starting")
+        if server.health.status == ServerStatus.IDLE:
+            manager.ensure_started(server.id)
+        server.last_used = time.monotonic()
+        return str(getattr(server.client, name)(**kwargs))
+    except Exception as e:
+        logger.error("❌ Error calling MCP tool %s: %s", name, e)
+        return f"Error calling MCP tool {name}: {e}"
+    finally:
+        with server._calls_lock:
+            server.in_flight -= 1
+            server.last_used = time.monotonic()
+
+STDERR_TAIL_LINES = 50  # stderr lines kept per server for failure reports
+STARTUP_WAIT_TIMEOUT = 60  # Seconds a tool call waits for its server to finish starting or stopping
+
+# Servers announce readiness on stdout; selectors cannot watch pipes on Windows, so there we only probe the port
+WATCH_STDOUT = os.name != "nt"
+DEFAULT_READY_PATTERN = r"listening|running on|started|ready"
+
+@lru_cache(maxsize=32)
+def _ready_regex(pattern: str) -> "re.Pattern[bytes]":
+    """Compile a readiness marker once for matching against raw stdout bytes"""
+    return re.compile(pattern.encode(), re.IGNORECASE)
+
+def _drain_stream(stream, sink: deque, server_id: str) -> None:
+    """Read a child's output until EOF, keeping only the most recent lines"""
+    try:
+        for line in stream:
+            line = line.rstrip()
+            sink.append(line)
+            logger.debug("[%s] %s", server_id, line)
+    except (OSError, ValueError):
+        pass  # Stream closed underneath us
+    finally:
+        stream.close()
+
+# Each server gets its own process group so a stop also reaches any children it spawned (npx, uvx, ...)
+_NEW_PROCESS_GROUP = (
+    {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt" else {"start_new_session": True}
+)
+
+def _signal_process_group(process: subprocess.Popen, force: bool = False) -> None:
+    """Terminate (or kill, when forced) a server process together with its process group"""
+    try:
+        if os.name == "nt":
+            process.kill() if force else process.terminate()
+        else:
+            os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+    except ProcessLookupError:
+        pass  # Already gone
+
 class ServerStatus(Enum):
     STOPPED = "stopped"
     STARTING = "starting"
     RUNNING = "running"
+    IDLE = "idle"  # Stopped after idle_timeout; cold-started on the next tool call
     UNHEALTHY = "unhealthy"
     FAILED = "failed"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ServerHealth:
+    """Immutable health snapshot; updates swap in a new instance with a single assignment"""
     status: ServerStatus = ServerStatus.STOPPED
     last_check: float = field(default_factory=time.time)
     failure_count: int = 0
-    error_message: Optional[str] = None
+    error_message: str | None = None
     uptime: float = 0
-    start_time: Optional[float] = None
+    start_time: float | None = None
+
+def _set_event() -> threading.Event:
+    """A threading.Event that starts out set"""
+    event = threading.Event()
+    event.set()
+    return event
 
-@dataclass
+@dataclass(slots=True)
 class MCP_Server:
     id: str
-    config: Dict[str, Any]
-    process: Optional[subprocess.Popen] = None
-    client: Optional[Client] = None
+    config: dict[str, Any]
+    process: subprocess.Popen | None = None
+    client: Client | None = None
     health: ServerHealth = field(default_factory=ServerHealth)
-    tools: List[Tool] = field(default_factory=list)
-    port: Optional[int] = None
+    tools: list[Tool] = field(default_factory=list)
+    port: int | None = None
+    last_used: float = field(default_factory=time.monotonic)  # Monotonic time of the last tool call
+    # (monotonic timestamp, list_tools result or raised exception) shared by concurrent probes
+    _tools_cache: tuple[float, Any] = field(default=(0.0, None), repr=False)
+    _tools_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    stderr_tail: deque = field(default_factory=deque, repr=False)  # Last stderr lines of the process
+    # Cleared while the server is starting or being idle-stopped; tool calls wait on it
+    ready: threading.Event = field(default_factory=_set_event, repr=False)
+    in_flight: int = 0  # Tool calls in progress; the idle sweep leaves busy servers alone
+    _calls_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
 class MCPManager:
     """Enhanced MCP Server Manager with dynamic loading and health monitoring"""
     
+    TOOLS_CACHE_TTL = 5.0  # Seconds a list_tools result (or failure) is reused
+    
     def __init__(self, config_path: str = "mcp_config.json", schema_path: str = "mcp_config_schema.json"):
         self.config_path = config_path
         self.schema_path = schema_path
-        self.servers: Dict[str, MCP_Server] = {}
-        self.config: Dict[str, Any] = {}
-        self.health_monitor_thread: Optional[threading.Thread] = None
+        self.servers: dict[str, MCP_Server] = {}
+        self.config: dict[str, Any] = {}
+        self.health_monitor_thread: threading.Thread | None = None
         self.monitoring_active = False
-        self.port_pool = set()
+        # Health checks wait in a deadline-ordered queue so the monitor only wakes when one is due
+        self._sched = sched.scheduler(time.monotonic, self._monitor_wait)
+        self._monitor_wakeup = threading.Event()
+        self._scheduled_checks: dict[str, sched.Event] = {}
+        self._probe_executor: ThreadPoolExecutor | None = None
+        # Recovery and idle stops get their own threads so hung probes can never starve them
+        self._maintenance_executor: ThreadPoolExecutor | None = None
+        self.port_pool: deque = deque()
+        self._lock = threading.Lock()  # Guards self.servers and self.port_pool
+        self._cold_start_lock = threading.Lock()  # Serializes on-demand starts of idle servers
+        # Tool indexes are rebuilt lazily when the version moves (a server changed status)
+        self._version_counter = count(1)
+        self._tools_version = 0
+        self._tools_index: tuple[int, list[Tool], dict[str, list[Tool]]] = (-1, [], {})
         self.validator = MCPConfigValidator(schema_path)
         self._load_config()
         
     def _load_config(self) -> None:
         """Load and validate configuration"""
         try:
-            # Load configuration
-            with open(self.config_path, 'r') as f:
-                self.config = json.load(f)
+            # Load configuration; the revision key and the content come from one read
+            config_key, self.config = _read_config_revision(self.config_path)
             
-            # Validate configuration with comprehensive validation
-            validation_result = self.validator.validate_config(self.config)
+            # Validate schema and structure once per file revision; PATH and port checks below
+            # depend on the machine's current state, so they run on every load
+            global _last_validation
+            validation_key = (config_key, os.path.abspath(self.schema_path))
+            last = _last_validation
+            if last is not None and last[0] == validation_key:
+                validation_result = last[1]
+            else:
+                validation_result = self.validator.validate_config(self.config, check_environment=False)
+                _last_validation = (validation_key, validation_result)
             if validation_result["valid"]:
                 logger.info("✅ Configuration validated successfully")
             else:
                 logger.error("❌ Configuration validation failed:")
                 for error in validation_result["errors"]:
-                    logger.error(f"  - {error}")
+                    logger.error("  - %s", error)
                 raise ValueError(f"Configuration validation failed: {validation_result['errors']}")
             
             # Log warnings and recommendations
-            for warning in validation_result["warnings"]:
-                logger.warning(f"⚠️ {warning}")
+            for warning in validation_result["warnings"] + self.validator.check_environment(self.config):
+                logger.warning("⚠️ %s", warning)
             for rec in validation_result["recommendations"]:
-                logger.info(f"💡 {rec}")
+                logger.info("💡 %s", rec)
             
             # Initialize port pool
             global_settings = self.config.get("global_settings", {})
             port_range = global_settings.get("port_range", {"start": 8000, "end": 9000})
-            self.port_pool = set(range(port_range["start"], port_range["end"] + 1))
+            self.port_pool = deque(range(port_range["start"], port_range["end"] + 1))
             
-            logger.info(f"📝 Loaded configuration with {len(self.config.get('mcp_servers', {}))} servers")
+            logger.info("📝 Loaded configuration with %d servers", len(self.config.get('mcp_servers', {})))
             
         except FileNotFoundError:
-            logger.error(f"❌ Configuration file not found: {self.config_path}")
+            logger.error("❌ Configuration file not found: %s", self.config_path)
             self.config = {"mcp_servers": {}, "global_settings": {}}
         except jsonschema.ValidationError as e:
-            logger.error(f"❌ Configuration validation failed: {e.message}")
+            logger.error("❌ Configuration validation failed: %s", e.message)
             raise
         except json.JSONDecodeError as e:
-            logger.error(f"❌ Invalid JSON in configuration: {e}")
+            logger.error("❌ Invalid JSON in configuration: %s", e)
             raise
     
     def _find_available_port(self) -> int:
         """Find an available port from the pool"""
-        for port in sorted(self.port_pool):
-            if self._is_port_available(port):
-                self.port_pool.remove(port)
-                return port
+        with self._lock:
+            # Take candidates from the front; busy ports rotate to the back
+            for _ in range(len(self.port_pool)):
+                port = self.port_pool.popleft()
+                if self._is_port_available(port):
+                    return port
+                self.port_pool.append(port)
         raise RuntimeError("No available ports in the configured range")
     
     def _is_port_available(self, port: int) -> bool:
@@ -119,7 +247,7 @@ class MCPManager:
             except OSError:
                 return False
     
-    def _create_server_instance(self, server_id: str, server_config: Dict[str, Any]) -> MCP_Server:
+    def _create_server_instance(self, server_id: str, server_config: dict[str, Any]) -> MCP_Server:
         """Create a new server instance"""
         # Assign port if not specified
         if "connection" in server_config and "port" not in server_config["connection"]:
@@ -133,179 +261,267 @@ class MCPManager:
     
     def start_server(self, server_id: str) -> bool:
         """Start a specific MCP server"""
-        if server_id not in self.config.get("mcp_servers", {}):
-            logger.error(f"❌ Server '{server_id}' not found in configuration")
+        server_config = self.config.get("mcp_servers", {}).get(server_id)
+        if server_config is None:
+            logger.error("❌ Server '%s' not found in configuration", server_id)
             return False
         
-        server_config = self.config["mcp_servers"][server_id]
-        
         # Check if server is disabled
         if not server_config.get("enabled", True):
-            logger.info(f"⏭️ Server '{server_id}' is disabled, skipping")
+            logger.info("⏭️ Server '%s' is disabled, skipping", server_id)
             return False
         
         # Create server instance if doesn't exist
-        if server_id not in self.servers:
-            self.servers[server_id] = self._create_server_instance(server_id, server_config)
-        
-        server = self.servers[server_id]
+        with self._lock:
+            server = self.servers.get(server_id)
+        if server is None:
+            server = self._create_server_instance(server_id, server_config)
+            with self._lock:
+                server = self.servers.setdefault(server_id, server)
         
         # Check if already running
         if server.health.status == ServerStatus.RUNNING:
-            logger.info(f"✅ Server '{server_id}' is already running")
+            logger.info("✅ Server '%s' is already running", server_id)
             return True
         
         try:
-            server.health.status = ServerStatus.STARTING
-            server.health.start_time = time.time()
+            self._update_health(server, status=ServerStatus.STARTING, start_time=time.time())
             
             # Prepare command and environment
             command = [server_config["command"]] + server_config.get("args", [])
             env = os.environ.copy()
             env.update(server_config.get("environment", {}))
             
-            logger.info(f"🚀 Starting MCP server '{server_id}': {' '.join(command)}")
+            logger.info("🚀 Starting MCP server '%s': %s", server_id, ' '.join(command))
             
-            # Start process
-            server.process = subprocess.Popen(
+            # Start process; stderr is drained continuously so a chatty server never blocks on a full pipe,
+            # stdout is watched for a readiness line and drained once startup is over
+            process = server.process = subprocess.Popen(
                 command,
-                stdout=subprocess.PIPE,
+                stdout=subprocess.PIPE if WATCH_STDOUT else subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 text=True,
-                env=env
+                env=env,
+                **_NEW_PROCESS_GROUP
+            )
+            stderr_tail = server.stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+            stderr_thread = threading.Thread(
+                target=_drain_stream,
+                args=(process.stderr, stderr_tail, server_id),
+                daemon=True
             )
+            stderr_thread.start()
             
-            # Wait for startup
+            # Wait for startup, returning as soon as the server reports ready or accepts connections
             startup_delay = server_config.get("connection", {}).get("startup_delay", 3)
-            time.sleep(startup_delay)
+            self._wait_for_startup(server, startup_delay)
             
             # Check if process is still running
-            if server.process.poll() is not None:
-                stdout, stderr = server.process.communicate()
-                error_msg = f"Process exited with code {server.process.returncode}. stderr: {stderr}"
-                logger.error(f"❌ Server '{server_id}' failed to start: {error_msg}")
-                server.health.status = ServerStatus.FAILED
-                server.health.error_message = error_msg
+            if process.poll() is not None:
+                stderr_thread.join(timeout=1)
+                stderr = "\n".join(stderr_tail)
+                error_msg = f"Process exited with code {process.returncode}. stderr: {stderr}"
+                logger.error("❌ Server '%s' failed to start: %s", server_id, error_msg)
+                self._update_health(server, status=ServerStatus.FAILED, error_message=error_msg)
                 return False
             
             # Try to connect
             if self._connect_to_server(server):
-                server.health.status = ServerStatus.RUNNING
-                server.health.failure_count = 0
-                server.health.error_message = None
-                logger.info(f"✅ Server '{server_id}' started successfully with {len(server.tools)} tools")
+                server.last_used = time.monotonic()
+                self._update_health(
+                    server, status=ServerStatus.RUNNING, failure_count=0, error_message=None
+                )
+                logger.info("✅ Server '%s' started successfully with %d tools", server_id, len(server.tools))
+                if self.monitoring_active:
+                    self._schedule_check(server)
                 return True
             else:
-                server.health.status = ServerStatus.FAILED
+                self._update_health(server, status=ServerStatus.FAILED)
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ Failed to start server '{server_id}': {e}")
-            server.health.status = ServerStatus.FAILED
-            server.health.error_message = str(e)
+            logger.error("❌ Failed to start server '%s': %s", server_id, e)
+            self._update_health(server, status=ServerStatus.FAILED, error_message=str(e))
+            return False
+    
+    def _wait_for_startup(self, server: MCP_Server, max_delay: float) -> bool:
+        """Wait until the server logs a readiness line or accepts connections, the process exits, or max_delay passes"""
+        connection = server.config.get("connection", {})
+        host = connection.get("host", "localhost")
+        ready = _ready_regex(connection.get("ready_pattern", DEFAULT_READY_PATTERN))
+        process, port = server.process, server.port
+        stdout = process.stdout
+        
+        selector = selectors.DefaultSelector()
+        if stdout is not None:
+            os.set_blocking(stdout.fileno(), False)
+            selector.register(stdout, selectors.EVENT_READ)
+        pending = b""  # Unterminated tail of the output read so far
+        deadline = time.monotonic() + max_delay
+        try:
+            while time.monotonic() < deadline:
+                if process.poll() is not None:
+                    return False
+                if selector.get_map():
+                    # Doubles as the poll interval: wakes early as soon as the server prints something
+                    for key, _ in selector.select(timeout=0.025):
+                        try:
+                            chunk = os.read(key.fd, 65536)
+                        except BlockingIOError:
+                            continue
+                        if not chunk:
+                            selector.unregister(key.fileobj)  # stdout closed; fall back to the port probe
+                            continue
+                        pending += chunk
+                        if ready.search(pending):
+                            return True
+                        pending = pending.rpartition(b"\n")[2]
+                else:
+                    time.sleep(0.025)
+                if port:
+                    try:
+                        with socket.create_connection((host, port), timeout=0.05):
+                            return True
+                    except OSError:
+                        pass
             return False
+        finally:
+            selector.close()
+            if stdout is not None:
+                # Hand stdout to a drain thread so later output can never fill the pipe
+                os.set_blocking(stdout.fileno(), True)
+                threading.Thread(
+                    target=_drain_stream, args=(stdout, deque(maxlen=0), server.id), daemon=True
+                ).start()
     
     def _connect_to_server(self, server: MCP_Server) -> bool:
         """Connect to a server and discover tools"""
+        server_id = server.id
         try:
             # Determine base URL
             connection = server.config.get("connection", {})
-            if "base_url" in connection:
-                base_url = connection["base_url"]
-            else:
+            base_url = connection.get("base_url")
+            if base_url is None:
                 host = connection.get("host", "localhost")
                 port = connection.get("port", server.port)
                 base_url = f"http://{host}:{port}"
             
-            logger.info(f"🔗 Connecting to server '{server.id}' at {base_url}")
+            logger.info("🔗 Connecting to server '%s' at %s", server_id, base_url)
             
             # Create client
             server.client = Client(base_url=base_url)
+            server._tools_cache = (0.0, None)
             
             # Discover tools
-            discovered_tools = server.client.list_tools()
-            logger.info(f"🔍 Discovered {len(discovered_tools)} tools for '{server.id}': {[t.get('name') for t in discovered_tools]}")
+            discovered_tools = self._list_tools(server)
+            if logger.isEnabledFor(logging.INFO):
+                tool_names = [t.get('name') for t in discovered_tools]
+                logger.info("🔍 Discovered %d tools for '%s': %s", len(discovered_tools), server_id, tool_names)
             
-            # Create LangChain tools
-            server.tools.clear()
-            for tool_info in discovered_tools:
-                tool_name = tool_info["name"]
-                tool_description = tool_info.get("description", "No description provided.")
-                parameters = tool_info.get("parameters", {})
-                
-                def create_tool_func(client, name):
-                    def _run_tool(**kwargs):
-                        try:
-                            tool_method = getattr(client, name)
-                            result = tool_method(**kwargs)
-                            return str(result)
-                        except Exception as e:
-                            logger.error(f"❌ Error calling MCP tool {name}: {e}")
-                            return f"Error calling MCP tool {name}: {e}"
-                    return _run_tool
-                
-                server.tools.append(
-                    Tool(
-                        name=f"{server.id}_{tool_name}",
-                        description=f"[{server.id}] {tool_description}",
-                        func=create_tool_func(server.client, tool_name),
-                        args_schema=parameters
-                    )
+            # Create LangChain tools, building the whole list before publishing it
+            # so readers never see a partial set
+            server.tools = [
+                Tool(
+                    name=f"{server_id}_{tool_info['name']}",
+                    description=f"[{server_id}] {tool_info.get('description', 'No description provided.')}",
+                    func=partial(_invoke_tool, self, server, tool_info["name"]),
+                    args_schema=tool_info.get("parameters", {})
                 )
+                for tool_info in discovered_tools
+            ]
             
             return True
             
         except Exception as e:
-            logger.error(f"❌ Failed to connect to server '{server.id}': {e}")
-            server.health.error_message = str(e)
+            logger.error("❌ Failed to connect to server '%s': %s", server_id, e)
+            self._update_health(server, error_message=str(e))
             return False
     
-    def stop_server(self, server_id: str) -> bool:
-        """Stop a specific MCP server"""
+    def _list_tools(self, server: MCP_Server) -> list[dict[str, Any]]:
+        """List a server's tools, coalescing calls made within TOOLS_CACHE_TTL into one RPC"""
+        cached_at, result = server._tools_cache
+        if time.monotonic() - cached_at >= self.TOOLS_CACHE_TTL:
+            with server._tools_lock:
+                # Another caller may have refreshed the entry while we waited
+                cached_at, result = server._tools_cache
+                if time.monotonic() - cached_at >= self.TOOLS_CACHE_TTL:
+                    started = time.monotonic()
+                    try:
+                        result = server.client.list_tools()
+                    except Exception as e:
+                        result = e
+                    # Keep a newer entry (e.g. a recorded health check timeout) over a late answer
+                    if server._tools_cache[0] <= started:
+                        server._tools_cache = (started, result)
+        
+        # Failures are cached too, so a struggling server is not hammered with retries
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def stop_server(self, server_id: str, idle: bool = False) -> bool:
+        """Stop a specific MCP server; idle stops keep its tools and port for a later cold start"""
         if server_id not in self.servers:
-            logger.warning(f"⚠️ Server '{server_id}' is not running")
+            logger.warning("⚠️ Server '%s' is not running", server_id)
             return True
         
         server = self.servers[server_id]
         
         try:
             if server.process and server.process.poll() is None:
-                logger.info(f"🛑 Stopping server '{server_id}'")
-                server.process.terminate()
+                logger.info("🛑 Stopping server '%s'", server_id)
+                _signal_process_group(server.process)
                 
                 # Wait for graceful shutdown
                 try:
                     server.process.wait(timeout=5)
                 except subprocess.TimeoutExpired:
-                    logger.warning(f"⚠️ Force killing server '{server_id}'")
-                    server.process.kill()
+                    logger.warning("⚠️ Force killing server '%s'", server_id)
+                    _signal_process_group(server.process, force=True)
                     server.process.wait()
             
             # Clean up
-            server.health.status = ServerStatus.STOPPED
+            server._tools_cache = (0.0, None)
+            if idle:
+                self._update_health(server, status=ServerStatus.IDLE)
+                logger.info("💤 Server '%s' stopped after being idle", server_id)
+                return True
+            
+            self._update_health(server, status=ServerStatus.STOPPED)
             server.client = None
-            server.tools.clear()
+            server.tools = []
             
             # Return port to pool
             if server.port:
-                self.port_pool.add(server.port)
+                with self._lock:
+                    if server.port not in self.port_pool:
+                        self.port_pool.append(server.port)
             
-            logger.info(f"✅ Server '{server_id}' stopped successfully")
+            logger.info("✅ Server '%s' stopped successfully", server_id)
             return True
             
         except Exception as e:
-            logger.error(f"❌ Error stopping server '{server_id}': {e}")
+            logger.error("❌ Error stopping server '%s': %s", server_id, e)
             return False
     
+    def ensure_started(self, server_id: str) -> bool:
+        """Cold-start an idle server, blocking until it is ready"""
+        with self._cold_start_lock:
+            server = self.servers.get(server_id)
+            if server is not None and server.health.status == ServerStatus.RUNNING:
+                return True
+            logger.info("❄️ Cold-starting idle server '%s'", server_id)
+            return self.start_server(server_id)
+    
     def restart_server(self, server_id: str) -> bool:
         """Restart a specific MCP server"""
-        logger.info(f"🔄 Restarting server '{server_id}'")
+        logger.info("🔄 Restarting server '%s'", server_id)
         self.stop_server(server_id)
         time.sleep(1)  # Brief pause
         return self.start_server(server_id)
     
-    def start_all_servers(self) -> Dict[str, bool]:
-        """Start all enabled servers"""
+    def start_all_servers(self) -> dict[str, bool]:
+        """Start all enabled servers, in parallel within each priority level"""
         results = {}
         server_configs = self.config.get("mcp_servers", {})
         
@@ -315,57 +531,104 @@ class MCPManager:
             key=lambda x: x[1].get("priority", 5)
         )
         
-        for server_id, server_config in sorted_servers:
-            if server_config.get("auto_start", True):
-                results[server_id] = self.start_server(server_id)
-            else:
-                logger.info(f"⏭️ Skipping server '{server_id}' (auto_start disabled)")
-                results[server_id] = False
+        for priority, group in groupby(sorted_servers, key=lambda x: x[1].get("priority", 5)):
+            to_start = []
+            for server_id, server_config in group:
+                if server_config.get("auto_start", True):
+                    to_start.append(server_id)
+                else:
+                    logger.info("⏭️ Skipping server '%s' (auto_start disabled)", server_id)
+                    results[server_id] = False
+            
+            if not to_start:
+                continue
+            
+            # Servers sharing a priority start concurrently; the next level waits for this one
+            with ThreadPoolExecutor(max_workers=min(32, len(to_start))) as executor:
+                for server_id, started in zip(to_start, executor.map(self.start_server, to_start)):
+                    results[server_id] = started
         
         return results
     
     def stop_all_servers(self) -> None:
         """Stop all running servers"""
         logger.info("🛑 Stopping all MCP servers")
+        
+        # Signal every live process at once and share one grace period instead of waiting per server
+        active = [s.process for s in list(self.servers.values()) if s.process and s.process.poll() is None]
+        for process in active:
+            _signal_process_group(process)
+        
+        deadline = time.monotonic() + 2
+        while active and time.monotonic() < deadline:
+            active = [p for p in active if p.poll() is None]
+            if active:
+                time.sleep(0.05)
+        
+        if active:
+            logger.warning("⚠️ Force killing %d unresponsive MCP servers", len(active))
+            for process in active:
+                _signal_process_group(process, force=True)
+            for process in active:
+                process.wait()
+        
+        # Processes are down; stop_server now only does the bookkeeping
         for server_id in list(self.servers.keys()):
             self.stop_server(server_id)
     
-    def get_server_status(self, server_id: str) -> Optional[Dict[str, Any]]:
+    def get_server_status(self, server_id: str) -> dict[str, Any] | None:
         """Get detailed status of a server"""
         if server_id not in self.servers:
             return None
         
         server = self.servers[server_id]
+        health = server.health  # Snapshot so fields are read consistently
         return {
             "id": server.id,
             "name": server.config.get("name", server.id),
-            "status": server.health.status.value,
-            "uptime": time.time() - server.health.start_time if server.health.start_time else 0,
-            "last_check": server.health.last_check,
-            "failure_count": server.health.failure_count,
-            "error_message": server.health.error_message,
+            "status": health.status.value,
+            "uptime": time.time() - health.start_time if health.start_time else 0,
+            "last_check": health.last_check,
+            "failure_count": health.failure_count,
+            "error_message": health.error_message,
             "tools_count": len(server.tools),
             "port": server.port,
             "category": server.config.get("category", "unknown"),
             "capabilities": server.config.get("capabilities", [])
         }
     
-    def get_all_tools(self) -> List[Tool]:
-        """Get all tools from all running servers"""
-        all_tools = []
-        for server in self.servers.values():
-            if server.health.status == ServerStatus.RUNNING:
-                all_tools.extend(server.tools)
-        return all_tools
+    def _update_health(self, server: MCP_Server, **changes: Any) -> None:
+        """Swap in an updated health snapshot, invalidating tool indexes on status changes"""
+        old = server.health
+        server.health = replace(old, **changes)
+        if server.health.status != old.status:
+            self._tools_version = next(self._version_counter)
+            if server.health.status == ServerStatus.STARTING:
+                server.ready.clear()
+            else:
+                server.ready.set()  # Started, failed or stopped: waiting calls see the outcome
+    
+    def _get_tools_index(self) -> tuple[list[Tool], dict[str, list[Tool]]]:
+        """Return (all available tools, available tools by category), rebuilding only when stale"""
+        version, all_tools, by_category = self._tools_index
+        current = self._tools_version
+        if version != current:
+            all_tools, by_category = [], {}
+            for server in list(self.servers.values()):
+                # Idle servers keep their tools; calling one cold-starts the server
+                if server.health.status in (ServerStatus.RUNNING, ServerStatus.IDLE):
+                    all_tools += server.tools
+                    by_category.setdefault(server.config.get("category"), []).extend(server.tools)
+            self._tools_index = (current, all_tools, by_category)
+        return all_tools, by_category
+    
+    def get_all_tools(self) -> list[Tool]:
+        """Get all tools from all running or idle servers"""
+        return list(self._get_tools_index()[0])
     
-    def get_tools_by_category(self, category: str) -> List[Tool]:
+    def get_tools_by_category(self, category: str) -> list[Tool]:
         """Get tools from servers of a specific category"""
-        tools = []
-        for server in self.servers.values():
-            if (server.health.status == ServerStatus.RUNNING and 
-                server.config.get("category") == category):
-                tools.extend(server.tools)
-        return tools
+        return list(self._get_tools_index()[1].get(category, []))
     
     def start_health_monitoring(self) -> None:
         """Start background health monitoring"""
@@ -373,6 +636,13 @@ class MCPManager:
             return
         
         self.monitoring_active = True
+        self._probe_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mcp-health")
+        self._maintenance_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mcp-maintenance")
+        for server in list(self.servers.values()):
+            if server.health.status == ServerStatus.RUNNING:
+                self._schedule_check(server)
+        if self.config.get("global_settings", {}).get("idle_timeout", 0):
+            self._sched.enter(1, 2, self._run_idle_sweep)
         self.health_monitor_thread = threading.Thread(target=self._health_monitor_loop, daemon=True)
         self.health_monitor_thread.start()
         logger.info("🏥 Health monitoring started")
@@ -380,68 +650,167 @@ class MCPManager:
     def stop_health_monitoring(self) -> None:
         """Stop background health monitoring"""
         self.monitoring_active = False
+        with self._lock:
+            self._scheduled_checks.clear()
+        for event in self._sched.queue:
+            try:
+                self._sched.cancel(event)
+            except ValueError:
+                pass  # Already ran
+        self._monitor_wakeup.set()
         if self.health_monitor_thread:
             self.health_monitor_thread.join(timeout=5)
+        if self._probe_executor:
+            self._probe_executor.shutdown(wait=False, cancel_futures=True)
+            self._probe_executor = None
+        if self._maintenance_executor:
+            self._maintenance_executor.shutdown(wait=False, cancel_futures=True)
+            self._maintenance_executor = None
         logger.info("🏥 Health monitoring stopped")
     
+    def _monitor_wait(self, delay: float | None) -> None:
+        """Scheduler delay function; returns early when a check is queued or monitoring stops"""
+        self._monitor_wakeup.wait(delay)
+        self._monitor_wakeup.clear()
+    
     def _health_monitor_loop(self) -> None:
-        """Background health monitoring loop"""
+        """Background health monitoring thread; sleeps until the next check is due"""
         while self.monitoring_active:
-            try:
-                for server_id, server in self.servers.items():
-                    if server.health.status == ServerStatus.RUNNING:
-                        self._check_server_health(server)
-                
-                time.sleep(10)  # Check every 10 seconds
-                
-            except Exception as e:
-                logger.error(f"❌ Health monitoring error: {e}")
-                time.sleep(30)  # Wait longer on error
+            self._sched.run()
+            if self.monitoring_active:
+                self._monitor_wait(None)  # Nothing queued until a server starts
     
-    def _check_server_health(self, server: MCP_Server) -> None:
-        """Check health of a specific server"""
+    def _schedule_check(self, server: MCP_Server, delay: float | None = None) -> None:
+        """Queue the next health check for a server unless one is already pending"""
         health_config = server.config.get("health_check", {})
         if not health_config.get("enabled", True):
             return
         
-        interval = health_config.get("interval", 30)
-        if time.time() - server.health.last_check < interval:
-            return
+        if delay is None:
+            interval = health_config.get("interval", 30)
+            delay = interval + random.uniform(0, interval * 0.1)  # Jitter spreads checks out
+        with self._lock:
+            if server.id in self._scheduled_checks:
+                return
+            self._scheduled_checks[server.id] = self._sched.enter(delay, 1, self._run_check, (server.id,))
+        self._monitor_wakeup.set()
+    
+    def _run_check(self, server_id: str) -> None:
+        """Run one scheduled health check; the next is queued while the server stays up"""
+        with self._lock:
+            self._scheduled_checks.pop(server_id, None)
+            server = self.servers.get(server_id)
+        if not self.monitoring_active or server is None or server.health.status != ServerStatus.RUNNING:
+            return  # start_server queues checks again when the server comes back
         
         try:
-            # Simple health check - try to list tools
-            if server.client:
-                server.client.list_tools()
-                server.health.last_check = time.time()
-                server.health.failure_count = 0
-                server.health.error_message = None
-            else:
-                raise Exception("No client connection")
-                
+            self._check_server_health(server)  # Queues the next check once the probe settles
         except Exception as e:
-            server.health.failure_count += 1
-            server.health.error_message = str(e)
-            server.health.last_check = time.time()
-            
+            logger.error("Health monitoring error for '%s': %s", server_id, e)
+            if self.monitoring_active and server.health.status == ServerStatus.RUNNING:
+                self._schedule_check(server, 30)  # Wait longer on error
+    
+    def _run_idle_sweep(self) -> None:
+        """Stop running servers that have not served a tool call within idle_timeout seconds"""
+        idle_timeout = self.config.get("global_settings", {}).get("idle_timeout", 0)
+        now = time.monotonic()
+        for server_id, server in list(self.servers.items()):
+            if (server.health.status == ServerStatus.RUNNING and not server.in_flight
+                    and now - server.last_used > idle_timeout):
+                self._maintenance_executor.submit(self._stop_if_idle, server_id, idle_timeout)
+        if self.monitoring_active:
+            self._sched.enter(1, 2, self._run_idle_sweep)
+    
+    def _stop_if_idle(self, server_id: str, idle_timeout: float) -> None:
+        """Idle-stop a server unless it was used or changed state since the sweeper looked"""
+        with self._cold_start_lock:
+            server = self.servers.get(server_id)
+            if server is None or server.health.status != ServerStatus.RUNNING:
+                return
+            with server._calls_lock:
+                if server.in_flight or time.monotonic() - server.last_used <= idle_timeout:
+                    return
+                server.ready.clear()  # Calls arriving from here on wait for the stop, then cold-start
+            try:
+                self.stop_server(server_id, idle=True)
+            finally:
+                server.ready.set()
+    
+    def _recover_server(self, server_id: str) -> None:
+        """Restart an unhealthy server off the monitor thread"""
+        logger.info("🔄 Attempting auto-recovery for '%s'", server_id)
+        if self.restart_server(server_id):
+            logger.info("✅ Auto-recovery successful for '%s'", server_id)
+        else:
+            logger.error("❌ Auto-recovery failed for '%s'", server_id)
+    
+    def _check_server_health(self, server: MCP_Server) -> None:
+        """Start a health probe for a server; its outcome is recorded without blocking the monitor thread"""
+        if not server.client:
+            self._record_probe(server, Exception("No client connection"))
+            return
+        
+        # Simple health check - try to list tools, bounded by the configured timeout. Whichever of the
+        # probe and the timeout event settles first records the outcome: cancelling the timeout event
+        # fails once the scheduler has taken it, so the other side backs off.
+        timeout = server.config.get("health_check", {}).get("timeout", 10)
+        future = self._probe_executor.submit(self._list_tools, server)
+        deadline = self._sched.enter(timeout, 0, self._probe_timed_out, (server, future))
+        self._monitor_wakeup.set()
+        future.add_done_callback(partial(self._probe_finished, server, deadline))
+    
+    def _probe_finished(self, server: MCP_Server, deadline: sched.Event, future: Future) -> None:
+        """Record a probe that answered before its timeout"""
+        try:
+            self._sched.cancel(deadline)
+        except ValueError:
+            return  # Timed out, or monitoring stopped
+        self._record_probe(server, None if future.cancelled() else future.exception())
+    
+    def _probe_timed_out(self, server: MCP_Server, future: Future) -> None:
+        """Record a probe that did not answer within the health check timeout"""
+        future.cancel()  # Still queued behind hung probes: do not run it at all
+        error = FuturesTimeoutError()
+        # Remember the timeout so the late-arriving probe result is not reused
+        server._tools_cache = (time.monotonic(), error)
+        self._record_probe(server, error)
+    
+    def _record_probe(self, server: MCP_Server, error: BaseException | None) -> None:
+        """Update a server's health from a probe outcome, recover it if needed and queue the next check"""
+        if error is None:
+            self._update_health(server, last_check=time.time(), failure_count=0, error_message=None)
+        else:
+            health_config = server.config.get("health_check", {})
+            health = server.health
+            failure_count = health.failure_count + 1
             retry_count = health_config.get("retry_count", 3)
-            if server.health.failure_count >= retry_count:
-                logger.warning(f"⚠️ Server '{server.id}' failed health check {server.health.failure_count} times")
-                server.health.status = ServerStatus.UNHEALTHY
-                
+            unhealthy = failure_count >= retry_count
+            self._update_health(
+                server,
+                status=ServerStatus.UNHEALTHY if unhealthy else health.status,
+                failure_count=failure_count,
+                error_message=str(error) or type(error).__name__,
+                last_check=time.time()
+            )
+        
+            if unhealthy:
+                logger.warning("⚠️ Server '%s' failed health check %d times", server.id, failure_count)
+        
                 # Auto-recovery if enabled
                 if self.config.get("global_settings", {}).get("auto_recovery", True):
-                    logger.info(f"🔄 Attempting auto-recovery for '{server.id}'")
-                    if self.restart_server(server.id):
-                        logger.info(f"✅ Auto-recovery successful for '{server.id}'")
-                    else:
-                        logger.error(f"❌ Auto-recovery failed for '{server.id}'")
+                    self._maintenance_executor.submit(self._recover_server, server.id)
+        
+        if self.monitoring_active and server.health.status == ServerStatus.RUNNING:
+            self._schedule_check(server)
 
-def load_mcp_tools(config_path: str = "mcp_config.json") -> Tuple[List[Tool], List[subprocess.Popen]]:
+def load_mcp_tools(config_path: str = "mcp_config.json",
+                   manager: MCPManager | None = None) -> tuple[list[Tool], list[subprocess.Popen]]:
     """
     Legacy function for backward compatibility
-    Returns tools and processes for existing code
+    Returns tools and processes for existing code; starts servers on `manager` when given
     """
-    manager = MCPManager(config_path)
+    if manager is None:
+        manager = MCPManager(config_path)
     manager.start_all_servers()
     manager.start_health_monitoring()
     
@@ -459,7 +828,7 @@ def load_mcp_tools(config_path: str = "mcp_config.json") -> Tuple[List[Tool], Li
     
     return tools, processes
 
-def terminate_mcp_processes(processes: List[subprocess.Popen]) -> None:
+def terminate_mcp_processes(processes: list[subprocess.Popen]) -> None:
     """Legacy function for backward compatibility"""
     global _global_mcp_manager
     if '_global_mcp_manager' in globals() and _global_mcp_manager:
@@ -467,4 +836,4 @@ def terminate_mcp_processes(processes: List[subprocess.Popen]) -> None:
         _global_mcp_manager.stop_health_monitoring()
 
 # Global manager instance for legacy compatibility
-_global_mcp_manager: Optional[MCPManager] = None
\ No newline at end of file
+_global_mcp_manager: MCPManager | None = None
\ No newline at end of file
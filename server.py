@@ -3,18 +3,40 @@
 Simple HTTP server for the Zwift Workout Visualizer
 """
 
+import argparse
+import asyncio
 import http.server
+import importlib.util
+import io
 import socketserver
 import socket
 import os
-import json
+import logging
+import mmap
+import queue
+import re
+import selectors
 import signal
+import stat
 import threading
 import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+from collections import OrderedDict, namedtuple
 from pathlib import Path
+from typing import ClassVar
+from urllib.parse import parse_qs, unquote, urlparse
+import httpx
+import orjson
 from dotenv import load_dotenv
+
+# Read .env once at startup, before the service modules below pick up their settings
+load_dotenv()
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
 from langchain_openai import ChatOpenAI
 from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from mcp_manager import load_mcp_tools, terminate_mcp_processes, MCPManager
 from src.services.trainingpeaks_backend import TrainingPeaksBackendService
@@ -22,6 +44,124 @@ import sys
 sys.path.append('src/services')
 from strava_backend import strava_service
 
+# Zwift's custom workout folder, resolved once instead of per request
+ZWIFT_WORKOUTS_DIR = os.path.expanduser('~/Documents/Zwift/Workouts')
+ZWIFT_WORKOUTS_REAL = os.path.realpath(ZWIFT_WORKOUTS_DIR)  # Symlink-resolved root for traversal checks
+
+# Transient OpenAI failures (connection errors, 408/409/429, 5xx) are retried per model call by the
+# client with jittered exponential backoff, so a flaky call never re-runs tools the agent already ran
+LLM_MAX_RETRIES = 3
+
+# One pooled client for every OpenAI call; idle connections are kept for a minute (httpx defaults
+# to 5s) so chat turns a few seconds apart reuse the TLS connection instead of handshaking again.
+# With the optional h2 package (httpx[http2]) concurrent calls also multiplex over one connection.
+OPENAI_HTTP2 = importlib.util.find_spec('h2') is not None
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0)
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
+OPENAI_HTTP_CLIENT = httpx.Client(http2=OPENAI_HTTP2, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT)
+# Streaming uses the async client; it only ever runs on the one agent loop below, so its pooled
+# connections are never handed to a different (or already closed) event loop
+OPENAI_ASYNC_HTTP_CLIENT = httpx.AsyncClient(
+    http2=OPENAI_HTTP2, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT
+)
+
+_agent_loop = None
+_agent_loop_lock = threading.Lock()
+
+def _get_agent_loop():
+    """Return the event loop that runs async agent calls, starting it on first use"""
+    global _agent_loop
+    with _agent_loop_lock:
+        if _agent_loop is None:
+            _agent_loop = asyncio.new_event_loop()
+            threading.Thread(target=_agent_loop.run_forever, name='agent-loop', daemon=True).start()
+        return _agent_loop
+
+# The system prompt and tool schemas form a fixed prefix on every agent call; keeping them
+# identical (and routed under one cache key) lets OpenAI serve that prefix from its prompt cache.
+# Order matters: static content first, dynamic last. Nothing per-request (dates, user names,
+# session data) may be formatted into the system message, or every call misses the cache.
+PROMPT_CACHE_KEY = 'zwift-agent-v1'
+AGENT_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", "You are a helpful assistant for Zwift workouts. You have access to the following tools:"),
+        # Everything below varies per request
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ]
+)
+
+# Agent tools that only compute an answer from their arguments. A reply is cached for identical
+# messages only when its run called none of the others, which may act (deploys, browser automation)
+_CACHEABLE_CHAT_TOOLS = frozenset(f'workout_creator_{name}' for name in (
+    'parse_workout_description', 'create_interval_workout', 'create_complex_interval_workout',
+    'calculate_tss', 'optimize_workout', 'get_power_zones', 'validate_workout',
+))
+
+def _is_cacheable_run(result):
+    """True when an agent run's reply can be reused: every tool it called is side-effect free"""
+    steps = result.get('intermediate_steps')
+    return steps is not None and all(action.tool in _CACHEABLE_CHAT_TOOLS for action, _ in steps)
+
+# A session's chat history as parallel columns (one role byte and one text per message), turned
+# into message objects only when the agent is invoked
+SessionHistory = namedtuple('SessionHistory', ['roles', 'texts'])
+_HUMAN_ROLE, _AI_ROLE = ord('H'), ord('A')
+
+# Markup rejected in deployed workouts; see _validate_workout_content
+_UNSAFE_XML_MARKUP = re.compile(r'<!ENTITY|<!DOCTYPE|<\?(?:php|xml-stylesheet|import)')
+
+# Translation tables for workout names: characters replaced in file names, and characters a name may not contain
+_FILENAME_UNSAFE = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+_NAME_FORBIDDEN_CHARS = '<>"\'&\x00\n\r\t'
+_NAME_FORBIDDEN = dict.fromkeys(map(ord, _NAME_FORBIDDEN_CHARS))
+
+# Keywords that pick an LLM error category, found in one regex pass instead of a chain of substring tests.
+# api_key also counts as an API mention, matching the nested "api" check it used to sit under.
+_LLM_ERROR_KEYWORDS = re.compile(r'api_key|authentication|rate|quota|connection|timeout|openai|api|mcp|tool|json|parse')
+_LLM_ERROR_GROUPS = {
+    'api_key': ('api', 'auth'), 'authentication': ('auth',),
+    'rate': ('rate',), 'quota': ('rate',),
+    'connection': ('network',), 'timeout': ('network',),
+    'openai': ('api',), 'api': ('api',),
+    'mcp': ('tool',), 'tool': ('tool',),
+    'json': ('data',), 'parse': ('data',),
+}
+
+# Canned replies for each LLM error category, built once and filled in with str.format
+_LLM_ERROR_REPLIES = {
+    'auth': "❌ **Authentication Error**\n\nThe OpenAI API key is invalid or missing.\n\n**Troubleshooting Steps:**\n1. Check that your .env file contains: `OPENAI_API_KEY=your_key_here`\n2. Verify your API key is valid at https://platform.openai.com/api-keys\n3. Restart the server after updating the .env file\n\n**Technical Details:** {error_type}: {error_message}",
+    'rate': "❌ **Rate Limit/Quota Error**\n\nYou've exceeded your OpenAI API usage limits.\n\n**Troubleshooting Steps:**\n1. Check your usage at https://platform.openai.com/usage\n2. Upgrade your OpenAI plan if needed\n3. Wait for rate limits to reset (usually 1 minute)\n\n**Technical Details:** {error_type}: {error_message}",
+    'network': "❌ **Network Connection Error**\n\nUnable to connect to OpenAI servers.\n\n**Troubleshooting Steps:**\n1. Check your internet connection\n2. Try again in a few moments\n3. Check OpenAI status at https://status.openai.com\n\n**Technical Details:** {error_type}: {error_message}",
+    'tool': "❌ **Tool Execution Error**\n\nError occurred while executing workout generation tools.\n\n**Troubleshooting Steps:**\n1. Check that all required dependencies are installed\n2. Verify the workout instructions are properly formatted\n3. Try a simpler workout description\n\n**Technical Details:** {error_type}: {error_message}",
+    'data': "❌ **Data Processing Error**\n\nError occurred while processing the workout data.\n\n**Troubleshooting Steps:**\n1. Check that your workout description follows the expected format\n2. Try simplifying the workout structure\n3. Check the debug output for malformed data\n\n**Technical Details:** {error_type}: {error_message}",
+    'generic': "❌ **Unexpected Error**\n\nAn unexpected error occurred during workout generation.\n\n**Troubleshooting Steps:**\n1. Try refreshing the page and submitting again\n2. Check the browser console for additional errors\n3. Verify all system requirements are met\n4. Try using local generation mode instead\n\n**Technical Details:** {error_type}: {error}\n\n**Need Help?** Check the console logs or try a simpler workout description.",
+}
+
+def _open_or_none(path, mode):
+    """Open a file for the caller to close, or return None when it cannot be opened"""
+    try:
+        return open(path, mode)
+    except OSError:
+        return None
+
+def _write_text(path, text):
+    """Write a text file; its directory is created at startup, so only recreate it if it went missing"""
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def _build_dispatch(routes):
+    """Pair a route table with one compiled pattern over its prefix ('/'-terminated) routes, in table order"""
+    prefixes = [route for route in routes if route.endswith('/')]
+    return routes, re.compile('|'.join(map(re.escape, prefixes))) if prefixes else None
+
 class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     """Enhanced HTTP request handler with CORS support and comprehensive error handling"""
     
@@ -32,6 +172,36 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     mcp_manager = None  # Enhanced MCP manager
     trainingpeaks_service = None  # TrainingPeaks backend service
     
+    # Largest JSON body accepted by default; chat messages, settings and webhooks are far smaller
+    MAX_JSON_BODY = 1024 * 1024
+    # Workout content is capped at 10M characters. In the JSON body a character takes at most 6 bytes
+    # as a \uXXXX escape, or 12 as an escaped surrogate pair outside the BMP; 64KB covers the rest
+    MAX_WORKOUT_CONTENT = 10_000_000
+    MAX_DEPLOY_BODY = 12 * MAX_WORKOUT_CONTENT + 64 * 1024
+    
+    # Recent chat turns per session, least recently active session first
+    CHAT_HISTORY_MESSAGES = 20
+    CHAT_SESSIONS_MAX = 256
+    _chat_sessions: ClassVar[OrderedDict] = OrderedDict()
+    _chat_sessions_lock = threading.Lock()
+    
+    # Serialized /mcp/status payload and when it goes stale
+    MCP_STATUS_MAX_AGE = 0.5  # Seconds
+    _mcp_status_cache = (0.0, None)
+    
+    # Serialized /workouts listings by directory, with the directory mtime they were built from
+    LISTING_CACHE_SIZE = 64
+    _listing_cache: ClassVar[dict] = {}
+    _listing_cache_lock = threading.Lock()
+    
+    # (expiry, reply) for recently seen chat messages, most recent last
+    CHAT_CACHE_SIZE = 256
+    CHAT_CACHE_TTL = 300  # Seconds, so asking again later gets a fresh answer
+    _chat_cache: ClassVar[OrderedDict] = OrderedDict()
+    _chat_cache_lock = threading.Lock()
+    _chat_pending: ClassVar[dict] = {}  # Message -> Future for first-turn agent calls in flight
+    CHAT_COALESCE_TIMEOUT = 60  # Seconds a duplicate message waits on the call in flight
+    
     # Request routing configuration
     POST_ROUTES = {
         '/deploy': '_handle_deploy',
@@ -81,12 +251,15 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     PUT_ROUTES = {
         '/api/strava/settings/': '_handle_strava_update_settings'
     }
+    
+    POST_DISPATCH = _build_dispatch(POST_ROUTES)
+    GET_DISPATCH = _build_dispatch(GET_ROUTES)
+    PUT_DISPATCH = _build_dispatch(PUT_ROUTES)
 
     @classmethod
     def initialize_agent(cls):
         try:
-            load_dotenv()
-            api_key = os.getenv('OPENAI_API_KEY')
+            api_key = OPENAI_API_KEY
             if not api_key:
                 print("[ERROR] OPENAI_API_KEY not set. LLM functionality will be disabled.")
                 print("[INFO] Create a .env file with: OPENAI_API_KEY=your_key_here")
@@ -96,25 +269,23 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                 return
 
             print("[INFO] Initializing OpenAI LLM with API key...")
-            cls.llm = ChatOpenAI(model="gpt-4o-mini", api_key=api_key)
+            cls.llm = ChatOpenAI(
+                model="gpt-4o-mini",
+                api_key=api_key,
+                extra_body={"prompt_cache_key": PROMPT_CACHE_KEY},
+                max_retries=LLM_MAX_RETRIES,
+                http_client=OPENAI_HTTP_CLIENT,
+                http_async_client=OPENAI_ASYNC_HTTP_CLIENT,
+            )
             
             print("[INFO] Loading MCP tools...")
+            # One manager serves both the agent's tools and the /mcp endpoints, and its servers are
+            # started here so the first chat does not pay for process spawns
             cls.mcp_manager = MCPManager()
-            mcp_tools, cls.mcp_processes = load_mcp_tools()
-
-            print("📝 Creating agent prompt template...")
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    ("system", "You are a helpful assistant for Zwift workouts. You have access to the following tools:"),
-                    MessagesPlaceholder(variable_name="chat_history"),
-                    ("human", "{input}"),
-                    MessagesPlaceholder(variable_name="agent_scratchpad"),
-                ]
-            )
+            mcp_tools, cls.mcp_processes = load_mcp_tools(manager=cls.mcp_manager)
 
             print("🤖 Creating LangChain agent...")
-            agent = create_tool_calling_agent(cls.llm, mcp_tools, prompt)
-            cls.agent_executor = AgentExecutor(agent=agent, tools=mcp_tools, verbose=True)
+            cls.rebuild_agent(mcp_tools)
             
             print("🏔️ Initializing TrainingPeaks backend service...")
             cls.trainingpeaks_service = TrainingPeaksBackendService()
@@ -143,20 +314,12 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             cls.llm = None
             cls.agent_executor = None
 
-    def end_headers(self):
-        # CORS headers
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        
-        # Security headers
-        self.add_security_headers()
-        super().end_headers()
-    
-    def add_security_headers(self):
-        """Add comprehensive security headers"""
-        # Content Security Policy
-        csp_policy = (
+    # CORS and security headers sent with every response, encoded once
+    STATIC_HEADERS = ''.join(f'{name}: {value}\r\n' for name, value in (
+        ('Access-Control-Allow-Origin', '*'),
+        ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+        ('Access-Control-Allow-Headers', 'Content-Type'),
+        ('Content-Security-Policy', (
             "default-src 'self'; "
             "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.tailwindcss.com https://cdn.jsdelivr.net; "
             "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdn.tailwindcss.com; "
@@ -166,33 +329,115 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             "object-src 'none'; "
             "base-uri 'self'; "
             "form-action 'self'"
-        )
-        self.send_header('Content-Security-Policy', csp_policy)
-        
-        # Additional security headers
-        self.send_header('X-Content-Type-Options', 'nosniff')
-        self.send_header('X-Frame-Options', 'DENY')
-        self.send_header('X-XSS-Protection', '1; mode=block')
-        self.send_header('Strict-Transport-Security', 'max-age=31536000; includeSubDomains')
-        self.send_header('Referrer-Policy', 'strict-origin-when-cross-origin')
-        self.send_header('Permissions-Policy', 'geolocation=(), microphone=(), camera=()')
+        )),
+        ('X-Content-Type-Options', 'nosniff'),
+        ('X-Frame-Options', 'DENY'),
+        ('X-XSS-Protection', '1; mode=block'),
+        ('Strict-Transport-Security', 'max-age=31536000; includeSubDomains'),
+        ('Referrer-Policy', 'strict-origin-when-cross-origin'),
+        ('Permissions-Policy', 'geolocation=(), microphone=(), camera=()'),
+    )).encode('latin-1')
+    
+    # Keep connections open between static asset fetches; idle ones wait on the server's selector
+    # rather than a worker and are dropped after the timeout
+    protocol_version = 'HTTP/1.1'
+    timeout = 30
+    # Buffer responses so headers and body leave in one send; streams and sendfile flush explicitly
+    wbufsize = -1
+    KEEP_ALIVE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+    _sent_content_length = False
+    
+    def handle(self):
+        """Serve the requests already sent on this connection; when it goes idle but stays open,
+        return with close_connection False so the server parks it instead of this worker waiting"""
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self._request_buffered():
+            self.handle_one_request()
+    
+    def _request_buffered(self):
+        """True when bytes of a pipelined request are already readable without blocking"""
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+    
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'content-length':
+            self._sent_content_length = True
+        super().send_header(keyword, value)
+    
+    @classmethod
+    def invalidate_mcp_status(cls):
+        """Drop the cached /mcp/status payload after a server changes state"""
+        cls._mcp_status_cache = (0.0, None)
+    
+    @classmethod
+    def rebuild_agent(cls, tools=None):
+        """Rebuild the agent around the given tools, or the MCP manager's currently available ones"""
+        if not cls.llm:
+            return
+        if tools is None:
+            tools = cls.mcp_manager.get_all_tools() if cls.mcp_manager else []
+        agent = create_tool_calling_agent(cls.llm, tools, AGENT_PROMPT)
+        cls.agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, return_intermediate_steps=True)
+        with cls._chat_cache_lock:
+            cls._chat_cache.clear()  # Replies may depend on tools that changed
+    
+    def end_headers(self):
+        # Reuse the connection only when the client can tell where this response ends and the
+        # request body (if any) cannot be left unread on the socket
+        if not self.close_connection and (
+            not self._sent_content_length or self.command not in self.KEEP_ALIVE_METHODS
+        ):
+            self.send_header('Connection', 'close')
+        self._sent_content_length = False
         
-        # Remove server information disclosure
-        self.send_header('Server', 'WkoLibrary/1.0')
+        # CORS and security headers, appended as one pre-encoded block
+        if hasattr(self, '_headers_buffer'):
+            self._headers_buffer.append(self.STATIC_HEADERS)
+        super().end_headers()
+    
+    def version_string(self):
+        """Identify as the app only, without the Python version"""
+        return 'WkoLibrary/1.0'
+    
+    def copyfile(self, source, outputfile):
+        """Send static files with socket.sendfile (zero-copy where the OS supports it)"""
+        if outputfile is self.wfile:
+            try:
+                source.fileno()
+            except (AttributeError, io.UnsupportedOperation):
+                pass  # In-memory body such as a directory listing
+            else:
+                self.wfile.flush()
+                self.connection.sendfile(source)
+                return
+        super().copyfile(source, outputfile)
+
+    def _find_handler(self, dispatch):
+        """Return the handler name for self.path: exact routes by hash lookup, then the first matching prefix"""
+        routes, prefix_pattern = dispatch
+        handler_name = routes.get(self.path)
+        if handler_name is None and prefix_pattern:
+            match = prefix_pattern.match(self.path)
+            if match:
+                handler_name = routes[match.group()]
+        return handler_name
 
     def do_OPTIONS(self):
         self.send_response(200)
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def do_POST(self):
         """Handle POST requests with improved error handling and routing"""
         try:
             # Route to appropriate handler
-            handler_name = None
-            for route, handler in self.POST_ROUTES.items():
-                if self.path == route or (route.endswith('/') and self.path.startswith(route)):
-                    handler_name = handler
-                    break
+            handler_name = self._find_handler(self.POST_DISPATCH)
             
             if handler_name:
                 handler_method = getattr(self, handler_name)
@@ -208,11 +453,7 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         """Handle PUT requests with improved error handling and routing"""
         try:
             # Route to appropriate handler
-            handler_name = None
-            for route, handler in self.PUT_ROUTES.items():
-                if self.path == route or (route.endswith('/') and self.path.startswith(route)):
-                    handler_name = handler
-                    break
+            handler_name = self._find_handler(self.PUT_DISPATCH)
             
             if handler_name:
                 handler_method = getattr(self, handler_name)
@@ -227,7 +468,7 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     def _handle_deploy(self):
         """Handle workout deployment requests with enhanced security validation"""
         try:
-            data = self._parse_json_request()
+            data = self._parse_json_request(max_length=self.MAX_DEPLOY_BODY)
             if not data:
                 return
             
@@ -250,8 +491,7 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                 return
             
             # Get the Zwift workout directory
-            zwift_dir = os.path.expanduser('~/Documents/Zwift/Workouts')
-            os.makedirs(zwift_dir, exist_ok=True)
+            zwift_dir = ZWIFT_WORKOUTS_DIR
             
             # Sanitize filename
             safe_name = self._sanitize_filename(data['name'])
@@ -263,8 +503,7 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                 return
             
             # Save the workout file
-            with open(workout_path, 'w', encoding='utf-8') as f:
-                f.write(data['content'])
+            _write_text(workout_path, data['content'])
             
             self._send_json_response({'success': True, 'path': workout_path})
             
@@ -288,12 +527,31 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                 self._send_json_response({'reply': diagnostic_reply}, status_code=500)
                 return
 
+            # Conversations continue only when the client sends a session_id
+            session_id = data.get('session_id')
+            history = self._get_chat_history(session_id)
+
+            if 'text/event-stream' in self.headers.get('Accept', ''):
+                self._stream_chat(user_message, session_id, history)
+                return
+
+            # Cached replies only stand in for a conversation's first turn
+            reply = None if history else self._get_cached_reply(user_message)
+            if reply is not None:
+                self._record_chat_turn(session_id, user_message, reply)
+                self._send_json_response({'reply': reply})
+                return
+
             try:
                 # Process LLM request
-                result = CORSHTTPRequestHandler.agent_executor.invoke(
-                    {"input": user_message, "chat_history": []}
-                )
-                reply = result['output']
+                if history:
+                    result = CORSHTTPRequestHandler.agent_executor.invoke(
+                        {"input": user_message, "chat_history": history}
+                    )
+                    reply = result['output']
+                else:
+                    reply = self._invoke_first_turn(user_message)
+                self._record_chat_turn(session_id, user_message, reply)
                 self._send_json_response({'reply': reply})
                 
             except Exception as e:
@@ -304,17 +562,169 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         except Exception as e:
             print(f"❌ Error handling chat request: {e}")
             self._send_error_response(500, f'Failed to process chat request: {str(e)}')
+    
+    def _stream_chat(self, user_message, session_id, history):
+        """Stream the agent's final answer as Server-Sent Events, one event per token"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        
+        def send_event(data):
+            self.wfile.write(b'data: ' + orjson.dumps(data) + b'\n\n')
+            self.wfile.flush()
+        
+        tokens = queue.SimpleQueue()
+        
+        async def relay():
+            result = None
+            events = CORSHTTPRequestHandler.agent_executor.astream_events(
+                {"input": user_message, "chat_history": history}, version="v2"
+            )
+            async for event in events:
+                kind = event['event']
+                if kind == 'on_chat_model_stream':
+                    token = event['data']['chunk'].content
+                    if token:  # Tool-calling rounds stream empty content
+                        tokens.put(token)
+                elif kind == 'on_chain_end' and not event.get('parent_ids'):
+                    result = event['data']['output']  # The executor's own run ends last
+            return result
+        
+        try:
+            reply = None if history else self._get_cached_reply(user_message)
+            if reply is None:
+                # The agent runs on the shared loop; this thread only writes tokens to the socket
+                future = asyncio.run_coroutine_threadsafe(relay(), _get_agent_loop())
+                future.add_done_callback(lambda _: tokens.put(None))
+                try:
+                    for token in iter(tokens.get, None):
+                        send_event({'token': token})
+                except OSError:
+                    future.cancel()  # Client went away; stop generating
+                    return
+                result = future.result()
+                reply = result['output'] if result is not None else None
+                if reply is not None and not history and _is_cacheable_run(result):
+                    self._cache_reply(user_message, reply)
+            if reply is not None:
+                self._record_chat_turn(session_id, user_message, reply)
+            send_event({'complete': True, 'reply': reply})
+        except Exception as e:
+            print(f"❌ Error streaming LLM request: {e}")
+            send_event({'complete': True, 'reply': self._categorize_llm_error(e)})
+    
+    def _invoke_first_turn(self, user_message):
+        """Run the agent on a message without history; concurrent identical messages share one call
+        unless it used a tool with side effects, in which case each request runs its own"""
+        cls = CORSHTTPRequestHandler
+        with cls._chat_cache_lock:
+            pending = cls._chat_pending.get(user_message)
+            leader = pending is None
+            if leader:
+                pending = cls._chat_pending[user_message] = Future()
+        if not leader:
+            try:
+                reply = pending.result(timeout=cls.CHAT_COALESCE_TIMEOUT)
+            except FuturesTimeoutError:
+                reply = None  # Leader is stuck; do not wait on it any longer
+            if reply is not None:
+                return reply
+            return self._run_first_turn(user_message)[0]
+        
+        shared = None  # Followers run the agent themselves unless the leader's reply can be reused
+        try:
+            reply, reusable = self._run_first_turn(user_message)
+            if reusable:
+                shared = reply
+            return reply
+        finally:
+            with cls._chat_cache_lock:
+                del cls._chat_pending[user_message]
+            pending.set_result(shared)
+    
+    def _run_first_turn(self, user_message):
+        """Run the agent without history; return its reply and whether it was cached for reuse"""
+        result = CORSHTTPRequestHandler.agent_executor.invoke({"input": user_message, "chat_history": []})
+        reply = result['output']
+        reusable = _is_cacheable_run(result)
+        if reusable:
+            self._cache_reply(user_message, reply)
+        return reply, reusable
+    
+    def _get_chat_history(self, session_id):
+        """Materialize a session's recent turns as LangChain messages (empty without a session)"""
+        if not session_id:
+            return []
+        cls = CORSHTTPRequestHandler
+        with cls._chat_sessions_lock:
+            history = cls._chat_sessions.get(session_id)
+            if history is None:
+                return []
+            cls._chat_sessions.move_to_end(session_id)
+            return [HumanMessage(text) if role == _HUMAN_ROLE else AIMessage(text)
+                    for role, text in zip(history.roles, history.texts)]
+    
+    def _record_chat_turn(self, session_id, user_message, reply):
+        """Append a turn to the session, keeping only its most recent CHAT_HISTORY_MESSAGES messages"""
+        if not session_id:
+            return
+        cls = CORSHTTPRequestHandler
+        with cls._chat_sessions_lock:
+            history = cls._chat_sessions.get(session_id)
+            if history is None:
+                history = cls._chat_sessions[session_id] = SessionHistory(bytearray(), [])
+                if len(cls._chat_sessions) > cls.CHAT_SESSIONS_MAX:
+                    cls._chat_sessions.popitem(last=False)
+            cls._chat_sessions.move_to_end(session_id)
+            history.roles.extend((_HUMAN_ROLE, _AI_ROLE))
+            history.texts.extend((user_message, reply))
+            overflow = len(history.texts) - cls.CHAT_HISTORY_MESSAGES
+            if overflow > 0:
+                del history.roles[:overflow]
+                del history.texts[:overflow]
+    
+    def _get_cached_reply(self, user_message):
+        """Return the cached agent reply for an identical message, if any and not yet expired"""
+        cls = CORSHTTPRequestHandler
+        with cls._chat_cache_lock:
+            entry = cls._chat_cache.get(user_message)
+            if entry is None:
+                return None
+            expires, reply = entry
+            if expires <= time.monotonic():
+                del cls._chat_cache[user_message]
+                return None
+            cls._chat_cache.move_to_end(user_message)
+            return reply
+    
+    def _cache_reply(self, user_message, reply):
+        """Remember an agent reply, evicting the least recently used entry when full"""
+        cls = CORSHTTPRequestHandler
+        with cls._chat_cache_lock:
+            cls._chat_cache[user_message] = (time.monotonic() + cls.CHAT_CACHE_TTL, reply)
+            cls._chat_cache.move_to_end(user_message)
+            if len(cls._chat_cache) > cls.CHAT_CACHE_SIZE:
+                cls._chat_cache.popitem(last=False)
+    
     def _handle_mcp_status(self):
         """Handle MCP server status requests"""
         if not self._check_mcp_manager():
             return
             
         try:
-            servers_status = {}
-            for server_id in CORSHTTPRequestHandler.mcp_manager.servers:
-                servers_status[server_id] = CORSHTTPRequestHandler.mcp_manager.get_server_status(server_id)
-            
-            self._send_json_response({'servers': servers_status})
+            cls = CORSHTTPRequestHandler
+            expires, body = cls._mcp_status_cache
+            if body is None or time.monotonic() >= expires:
+                # Pollers within the same window share one serialized snapshot
+                manager = cls.mcp_manager
+                servers_status = {}
+                for server_id in list(manager.servers):
+                    servers_status[server_id] = manager.get_server_status(server_id)
+                body = orjson.dumps({'servers': servers_status}, option=orjson.OPT_NON_STR_KEYS)
+                cls._mcp_status_cache = (time.monotonic() + cls.MCP_STATUS_MAX_AGE, body)
+            
+            self._send_json_body(body)
             
         except Exception as e:
             print(f"❌ Error getting MCP status: {e}")
@@ -336,7 +746,9 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                 return
             
             success = CORSHTTPRequestHandler.mcp_manager.start_server(server_id)
+            CORSHTTPRequestHandler.invalidate_mcp_status()
             status = CORSHTTPRequestHandler.mcp_manager.get_server_status(server_id)
+            CORSHTTPRequestHandler.rebuild_agent()
             
             self._send_json_response({'success': success, 'status': status})
             
@@ -360,6 +772,8 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                 return
             
             success = CORSHTTPRequestHandler.mcp_manager.stop_server(server_id)
+            CORSHTTPRequestHandler.invalidate_mcp_status()
+            CORSHTTPRequestHandler.rebuild_agent()
             self._send_json_response({'success': success})
             
         except Exception as e:
@@ -382,7 +796,9 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                 return
             
             success = CORSHTTPRequestHandler.mcp_manager.restart_server(server_id)
+            CORSHTTPRequestHandler.invalidate_mcp_status()
             status = CORSHTTPRequestHandler.mcp_manager.get_server_status(server_id)
+            CORSHTTPRequestHandler.rebuild_agent()
             
             self._send_json_response({'success': success, 'status': status})
             
@@ -603,18 +1019,22 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
 
     # Helper methods
     
-    def _parse_json_request(self):
-        """Parse JSON request body with error handling"""
+    def _parse_json_request(self, max_length=MAX_JSON_BODY):
+        """Parse JSON request body with error handling, rejecting bodies over max_length unread"""
         try:
             content_length = int(self.headers.get('Content-Length', 0))
             if content_length == 0:
                 self._send_error_response(400, 'Request body is required')
                 return None
+            if max_length is not None and content_length > max_length:
+                self.close_connection = True  # The unread body must not be parsed as the next request
+                self._send_error_response(413, f'Request body too large: {content_length} bytes (max: {max_length})')
+                return None
                 
             post_data = self.rfile.read(content_length)
-            return json.loads(post_data.decode('utf-8'))
+            return orjson.loads(post_data)  # Parses the raw bytes, no decoded str copy
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             self._send_error_response(400, f'Invalid JSON: {str(e)}')
             return None
         except Exception as e:
@@ -623,50 +1043,48 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     
     def _send_json_response(self, data, status_code=200):
         """Send JSON response with proper headers"""
+        self._send_json_body(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), status_code)
+    
+    def _send_json_body(self, body, status_code=200):
+        """Send an already serialized JSON body"""
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        response_data = json.dumps(data, ensure_ascii=False)
-        self.wfile.write(response_data.encode('utf-8'))
+        self.wfile.write(body)
     
     def _send_error_response(self, status_code, message):
         """Send error response with consistent format"""
+        body = orjson.dumps({'error': message, 'status': status_code})
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        error_data = {'error': message, 'status': status_code}
-        self.wfile.write(json.dumps(error_data).encode('utf-8'))
+        self.wfile.write(body)
     
     def _sanitize_filename(self, filename):
         """Sanitize filename to prevent path traversal attacks"""
-        import re
-        # Remove any path separators and dangerous characters
-        safe_name = re.sub(r'[<>:"/\\|?*]', '_', filename)
-        # Limit length and strip whitespace
-        return safe_name.strip()[:100]
+        # Replace path separators and dangerous characters, then limit length and strip whitespace
+        return filename.translate(_FILENAME_UNSAFE).strip()[:100]
     
     def _validate_workout_content(self, content):
         """Validate workout content for security and format"""
-        import xml.etree.ElementTree as ET
-        
         try:
             # File size validation (10MB limit)
-            if len(content) > 10_000_000:
+            if len(content) > self.MAX_WORKOUT_CONTENT:
                 return {'valid': False, 'error': f'Content too large: {len(content)} bytes (max: 10MB)'}
             
-            # XML bomb protection - check for entity declarations
-            if '<!ENTITY' in content:
-                return {'valid': False, 'error': 'XML entities are not allowed'}
-            
-            # Check for external DTD references
-            if '<!DOCTYPE' in content and 'SYSTEM' in content:
-                return {'valid': False, 'error': 'External DTD references are not allowed'}
-            
-            # Check for potentially dangerous processing instructions
-            dangerous_pi = ['<?php', '<?xml-stylesheet', '<?import']
-            for pi in dangerous_pi:
-                if pi in content:
-                    return {'valid': False, 'error': f'Dangerous processing instruction detected: {pi}'}
+            # Entity declarations (XML bombs), external DTDs and dangerous processing instructions,
+            # found in one scan; clean workouts never match, so this is a single pass over the content
+            for match in _UNSAFE_XML_MARKUP.finditer(content):
+                markup = match.group()
+                if markup == '<!ENTITY':
+                    return {'valid': False, 'error': 'XML entities are not allowed'}
+                if markup == '<!DOCTYPE':
+                    if 'SYSTEM' in content:
+                        return {'valid': False, 'error': 'External DTD references are not allowed'}
+                    continue
+                return {'valid': False, 'error': f'Dangerous processing instruction detected: {markup}'}
             
             # Basic XML structure validation
             try:
@@ -692,11 +1110,10 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             if len(name) > 200:
                 return {'valid': False, 'error': f'Workout name too long: {len(name)} chars (max: 200)'}
             
-            # Check for dangerous characters
-            dangerous_chars = ['<', '>', '"', "'", '&', '\x00', '\n', '\r', '\t']
-            for char in dangerous_chars:
-                if char in name:
-                    return {'valid': False, 'error': f'Invalid character in workout name: {repr(char)}'}
+            # Check for dangerous characters: deleting them all in one pass shortens the name if any are present
+            if len(name.translate(_NAME_FORBIDDEN)) != len(name):
+                char = next(char for char in _NAME_FORBIDDEN_CHARS if char in name)
+                return {'valid': False, 'error': f'Invalid character in workout name: {repr(char)}'}
             
             # Check for path traversal attempts
             if '..' in name or '/' in name or '\\' in name:
@@ -716,31 +1133,33 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     
     def _get_llm_diagnostic_message(self):
         """Get diagnostic message for LLM initialization issues"""
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
+        if not OPENAI_API_KEY:
             return "❌ **LLM Configuration Error**\n\nOpenAI API key not found.\n\n**Troubleshooting Steps:**\n1. Create a `.env` file in the project root\n2. Add your OpenAI API key: `OPENAI_API_KEY=your_key_here`\n3. Get an API key from https://platform.openai.com/api-keys\n4. Restart the server after adding the key\n\n**Current Status:** No API key detected in environment variables"
         else:
             return "❌ **LLM Initialization Error**\n\nThe LLM agent failed to initialize despite having an API key.\n\n**Troubleshooting Steps:**\n1. Verify your API key is valid at https://platform.openai.com/api-keys\n2. Check your OpenAI account has sufficient credits\n3. Restart the server to retry initialization\n4. Check the server console for detailed error messages\n\n**Current Status:** API key present but agent initialization failed"
     
     def _categorize_llm_error(self, error):
         """Categorize LLM errors and provide specific guidance"""
-        error_type = type(error).__name__
         error_message = str(error).lower()
+        groups = {group for keyword in _LLM_ERROR_KEYWORDS.findall(error_message)
+                  for group in _LLM_ERROR_GROUPS[keyword]}
         
-        if "openai" in error_message or "api" in error_message:
-            if "api_key" in error_message or "authentication" in error_message:
-                return f"❌ **Authentication Error**\n\nThe OpenAI API key is invalid or missing.\n\n**Troubleshooting Steps:**\n1. Check that your .env file contains: `OPENAI_API_KEY=your_key_here`\n2. Verify your API key is valid at https://platform.openai.com/api-keys\n3. Restart the server after updating the .env file\n\n**Technical Details:** {error_type}: {error_message}"
-            elif "rate" in error_message or "quota" in error_message:
-                return f"❌ **Rate Limit/Quota Error**\n\nYou've exceeded your OpenAI API usage limits.\n\n**Troubleshooting Steps:**\n1. Check your usage at https://platform.openai.com/usage\n2. Upgrade your OpenAI plan if needed\n3. Wait for rate limits to reset (usually 1 minute)\n\n**Technical Details:** {error_type}: {error_message}"
-            elif "connection" in error_message or "timeout" in error_message:
-                return f"❌ **Network Connection Error**\n\nUnable to connect to OpenAI servers.\n\n**Troubleshooting Steps:**\n1. Check your internet connection\n2. Try again in a few moments\n3. Check OpenAI status at https://status.openai.com\n\n**Technical Details:** {error_type}: {error_message}"
-        elif "mcp" in error_message or "tool" in error_message:
-            return f"❌ **Tool Execution Error**\n\nError occurred while executing workout generation tools.\n\n**Troubleshooting Steps:**\n1. Check that all required dependencies are installed\n2. Verify the workout instructions are properly formatted\n3. Try a simpler workout description\n\n**Technical Details:** {error_type}: {error_message}"
-        elif "json" in error_message or "parse" in error_message:
-            return f"❌ **Data Processing Error**\n\nError occurred while processing the workout data.\n\n**Troubleshooting Steps:**\n1. Check that your workout description follows the expected format\n2. Try simplifying the workout structure\n3. Check the debug output for malformed data\n\n**Technical Details:** {error_type}: {error_message}"
+        category = 'generic'
+        if 'api' in groups:
+            if 'auth' in groups:
+                category = 'auth'
+            elif 'rate' in groups:
+                category = 'rate'
+            elif 'network' in groups:
+                category = 'network'
+        elif 'tool' in groups:
+            category = 'tool'
+        elif 'data' in groups:
+            category = 'data'
         
-        # Generic error
-        return f"❌ **Unexpected Error**\n\nAn unexpected error occurred during workout generation.\n\n**Troubleshooting Steps:**\n1. Try refreshing the page and submitting again\n2. Check the browser console for additional errors\n3. Verify all system requirements are met\n4. Try using local generation mode instead\n\n**Technical Details:** {error_type}: {str(error)}\n\n**Need Help?** Check the console logs or try a simpler workout description."
+        return _LLM_ERROR_REPLIES[category].format(
+            error_type=type(error).__name__, error_message=error_message, error=error
+        )
 
     # TrainingPeaks API Handlers
     
@@ -934,11 +1353,7 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         """Handle GET requests with improved error handling and routing"""
         try:
             # Route to appropriate handler
-            handler_name = None
-            for route, handler in self.GET_ROUTES.items():
-                if self.path == route or (route.endswith('/') and self.path.startswith(route)):
-                    handler_name = handler
-                    break
+            handler_name = self._find_handler(self.GET_DISPATCH)
             
             if handler_name:
                 handler_method = getattr(self, handler_name)
@@ -950,54 +1365,136 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             self._send_error_response(500, f'Internal server error: {str(e)}')
             return
             
-        # Fall back to parent implementation for file serving
-        if self.path.startswith('/workouts'):
-            # List Zwift/Workouts directory
-            zwift_dir = os.path.expanduser('~/Documents/Zwift/Workouts')
-            rel_path = self.path[len('/workouts'):].lstrip('/')
-            target_dir = os.path.join(zwift_dir, rel_path)
-            if not os.path.exists(target_dir):
-                self.send_response(404)
-                self.end_headers()
-                return
-            items = []
-            for entry in os.scandir(target_dir):
-                items.append({
-                    'name': entry.name,
-                    'is_dir': entry.is_dir(),
-                    'path': os.path.relpath(entry.path, zwift_dir)
-                })
+        # Workout library routes, otherwise fall back to parent implementation for file serving
+        path, _, query = self.path.partition('?')
+        if path == '/workouts' or path.startswith('/workouts/'):
+            self._handle_workouts_list(unquote(path[len('/workouts'):].lstrip('/')))
+        elif path == '/workout' and query.startswith('file='):
+            self._handle_workout_file(unquote(query[len('file='):]))
+        elif path == '/workout/raw' and query.startswith('file='):
+            self._handle_workout_raw(unquote(query[len('file='):]))
+        else:
+            super().do_GET()
+    
+    def _resolve_workout_path(self, rel_path):
+        """Resolve a path inside the Zwift workouts directory, or None if it escapes it"""
+        target = os.path.realpath(os.path.join(ZWIFT_WORKOUTS_REAL, rel_path))
+        if target == ZWIFT_WORKOUTS_REAL or target.startswith(ZWIFT_WORKOUTS_REAL + os.sep):
+            return target
+        return None
+    
+    def _handle_workouts_list(self, rel_path):
+        """List a folder of the Zwift workouts directory"""
+        zwift_dir = ZWIFT_WORKOUTS_REAL
+        target_dir = self._resolve_workout_path(rel_path)
+        try:
+            dir_stat = os.stat(target_dir) if target_dir else None
+        except OSError:
+            dir_stat = None
+        if dir_stat is None or not stat.S_ISDIR(dir_stat.st_mode):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        # Adding, removing or renaming an entry bumps the directory mtime, so an unchanged mtime
+        # means the cached listing is still current
+        mtime_ns = dir_stat.st_mtime_ns
+        cached = self._listing_cache.get(target_dir)
+        if cached and cached[0] == mtime_ns:
+            body = cached[1]
+        else:
+            # Serialize entries straight into one buffer instead of building a list of dicts first
+            body = bytearray(b'{"items":[')
+            with os.scandir(target_dir) as entries:
+                for i, entry in enumerate(entries):
+                    if i:
+                        body += b','
+                    body += orjson.dumps({
+                        'name': entry.name,
+                        'is_dir': entry.is_dir(),
+                        'path': os.path.relpath(entry.path, zwift_dir)
+                    })
+            body += b']}'
+            body = bytes(body)
+            
+            # An entry changed during the scan may or may not be in the listing, so it belongs to no
+            # single mtime: send it, but neither cache it nor tag it
+            try:
+                scanned_at = os.stat(target_dir).st_mtime_ns
+            except OSError:
+                scanned_at = None
+            if scanned_at != mtime_ns:
+                mtime_ns = None
+            else:
+                listing_cache = self._listing_cache
+                with self._listing_cache_lock:
+                    listing_cache.pop(target_dir, None)  # Re-insert as newest
+                    listing_cache[target_dir] = (mtime_ns, body)
+                    if len(listing_cache) > self.LISTING_CACHE_SIZE:
+                        del listing_cache[next(iter(listing_cache))]
+        
+        etag = None if mtime_ns is None else f'"{mtime_ns:x}"'
+        not_modified = etag is not None and self.headers.get('If-None-Match') == etag
+        if not_modified:
+            self.send_response(304)
+        else:
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))  # A 304 repeats the length it would have sent
+        self.end_headers()
+        if not not_modified:
+            self.wfile.write(body)
+    
+    def _handle_workout_file(self, file_param):
+        """Return the content of a .zwo file"""
+        # Reject traversal outside the workouts directory before touching the filesystem
+        file_path = self._resolve_workout_path(file_param)
+        if file_path is None or not os.path.isfile(file_path):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
             self.end_headers()
-            self.wfile.write(json.dumps({'items': items}).encode('utf-8'))
-        elif self.path.startswith('/workout?file='):
-            # Return the content of a .zwo file
-            from urllib.parse import unquote
-            zwift_dir = os.path.expanduser('~/Documents/Zwift/Workouts')
-            file_param = self.path[len('/workout?file='):]
-            file_path = os.path.join(zwift_dir, unquote(file_param))
-            if not os.path.isfile(file_path):
-                self.send_response(404)
-                self.end_headers()
-                return
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            return
+        # Decode straight from the mapped pages instead of reading into an intermediate bytes copy
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    content = str(mm, 'utf-8')
+            else:
+                content = ''  # mmap cannot map an empty file
+        body = orjson.dumps({'content': content})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle_workout_raw(self, file_param):
+        """Send a .zwo file as-is, copied from the page cache to the socket by sendfile"""
+        file_path = self._resolve_workout_path(file_param)
+        f = _open_or_none(file_path, 'rb') if file_path else None
+        if f is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
             self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Type', 'application/xml')
+            self.send_header('Content-Length', str(size))
             self.end_headers()
-            self.wfile.write(json.dumps({'content': content}).encode('utf-8'))
-        else:
-            super().do_GET()
+            self.wfile.flush()
+            self.connection.sendfile(f)
 
-    # Strava Integration Handler Methods
-    
     def _handle_strava_token_exchange(self):
         """Handle Strava OAuth token exchange"""
         try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = self._parse_json_request()
+            if data is None:
+                return
             
             code = data.get('code')
             user_id = data.get('userId')
@@ -1126,25 +1623,22 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             self.send_response(200)
             self.send_header('Content-Type', 'text/plain')
             self.send_header('Cache-Control', 'no-cache')
-            self.send_header('Connection', 'keep-alive')
             self.end_headers()
             
             def progress_callback(data):
                 # Send progress updates as Server-Sent Events
-                event_data = f"data: {json.dumps(data)}\n\n"
-                self.wfile.write(event_data.encode('utf-8'))
+                self.wfile.write(b'data: ' + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS) + b'\n\n')
                 self.wfile.flush()
             
             result = strava_service.import_historical_activities(user_id, progress_callback)
             
             # Send final result
-            final_data = f"data: {json.dumps({'complete': True, 'result': result})}\n\n"
-            self.wfile.write(final_data.encode('utf-8'))
+            final_data = orjson.dumps({'complete': True, 'result': result}, option=orjson.OPT_NON_STR_KEYS)
+            self.wfile.write(b'data: ' + final_data + b'\n\n')
             self.wfile.flush()
             
         except Exception as e:
-            error_data = f"data: {json.dumps({'error': str(e)})}\n\n"
-            self.wfile.write(error_data.encode('utf-8'))
+            self.wfile.write(b'data: ' + orjson.dumps({'error': str(e)}) + b'\n\n')
             self.wfile.flush()
     
     def _handle_strava_update_settings(self):
@@ -1157,9 +1651,9 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
             
             user_id = path_parts[4]  # /api/strava/settings/{user_id}
             
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            settings = json.loads(post_data.decode('utf-8'))
+            settings = self._parse_json_request()
+            if settings is None:
+                return
             
             success = strava_service.update_user_settings(user_id, settings)
             self._send_json_response({'success': success})
@@ -1170,8 +1664,6 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     def _handle_strava_callback(self):
         """Handle Strava OAuth callback"""
         try:
-            from urllib.parse import parse_qs, urlparse
-            
             parsed_url = urlparse(self.path)
             # Note: OAuth callback parameters are parsed but handled by frontend
             parse_qs(parsed_url.query)  # Parse for validation but not currently used
@@ -1214,8 +1706,6 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         if self.command == 'GET':
             # Webhook subscription verification
             try:
-                from urllib.parse import parse_qs, urlparse
-                
                 parsed_url = urlparse(self.path)
                 query_params = parse_qs(parsed_url.query)
                 
@@ -1229,7 +1719,7 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
                         self.send_response(200)
                         self.send_header('Content-Type', 'application/json')
                         self.end_headers()
-                        self.wfile.write(json.dumps({'hub.challenge': challenge}).encode('utf-8'))
+                        self.wfile.write(orjson.dumps({'hub.challenge': challenge}))
                     else:
                         self._send_error_response(403, 'Verification failed')
                 else:
@@ -1241,9 +1731,9 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         elif self.command == 'POST':
             # Webhook event processing
             try:
-                content_length = int(self.headers['Content-Length'])
-                post_data = self.rfile.read(content_length)
-                event_data = json.loads(post_data.decode('utf-8'))
+                event_data = self._parse_json_request()
+                if event_data is None:
+                    return
                 
                 success = strava_service.process_webhook_event(event_data)
                 
@@ -1311,6 +1801,114 @@ class CORSHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         except Exception as e:
             self._send_error_response(500, f'Failed to get webhook status: {str(e)}')
 
+class ThreadedHTTPServer(socketserver.ThreadingTCPServer):
+    """TCP server handling connections on a bounded pool of worker threads, so a slow /chat never
+    stalls other requests and a burst of them cannot spawn unbounded threads. Idle keep-alive
+    connections are watched by one selector thread and only take a worker once a request arrives."""
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+    
+    def __init__(self, server_address, RequestHandlerClass, max_workers=None):
+        super().__init__(server_address, RequestHandlerClass)
+        self.max_workers = max_workers or min(64, (os.cpu_count() or 1) * 4 + 16)
+        self.idle_timeout = getattr(RequestHandlerClass, 'timeout', None) or 30
+        self._connections = queue.SimpleQueue()
+        self._parked = queue.SimpleQueue()
+        self._closing = False
+        self._park_lock = threading.Lock()
+        self._keep_open = {}  # Served connections to park rather than close, with their client address
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._idle_thread = threading.Thread(target=self._idle_loop, name='http-idle', daemon=True)
+        self._idle_thread.start()
+        # Daemon workers, like daemon_threads, so a stuck LLM call never blocks interpreter exit
+        for i in range(self.max_workers):
+            threading.Thread(target=self._worker, name=f'http-worker-{i}', daemon=True).start()
+    
+    def _worker(self):
+        for request, client_address in iter(self._connections.get, None):
+            self.process_request_thread(request, client_address)
+    
+    def process_request(self, request, client_address):
+        """Queue the connection for the next free worker (connections wait here when all are busy)"""
+        self._connections.put((request, client_address))
+    
+    def finish_request(self, request, client_address):
+        """Handle a connection, remembering it for parking if it is idle but still open"""
+        if not self.RequestHandlerClass(request, client_address, self).close_connection:
+            self._keep_open[request] = client_address
+    
+    def shutdown_request(self, request):
+        """Park a connection the client keeps open with the idle watcher; close any other"""
+        client_address = self._keep_open.pop(request, None)
+        if client_address is not None:
+            with self._park_lock:
+                if not self._closing:
+                    self._parked.put((request, client_address))
+                    self._wakeup_w.send(b'\0')
+                    return
+        super().shutdown_request(request)
+    
+    def _idle_loop(self):
+        """Hand parked connections back to the workers once readable, closing those idle too long"""
+        deadlines = {}  # Parked socket -> deadline, oldest first since every park uses the same timeout
+        while not self._closing:
+            timeout = max(0.0, next(iter(deadlines.values())) - time.monotonic()) if deadlines else None
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj is self._wakeup_r:
+                    try:
+                        while self._wakeup_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    while True:
+                        try:
+                            request, client_address = self._parked.get_nowait()
+                        except queue.Empty:
+                            break
+                        self._selector.register(request, selectors.EVENT_READ, client_address)
+                        deadlines[request] = time.monotonic() + self.idle_timeout
+                else:
+                    self._selector.unregister(key.fileobj)
+                    del deadlines[key.fileobj]
+                    self._connections.put((key.fileobj, key.data))
+            now = time.monotonic()
+            while deadlines and next(iter(deadlines.values())) <= now:
+                request = next(iter(deadlines))
+                del deadlines[request]
+                self._selector.unregister(request)
+                self.shutdown_request(request)
+        for request in deadlines:
+            self.shutdown_request(request)
+    
+    def server_close(self):
+        super().server_close()
+        with self._park_lock:
+            self._closing = True
+            self._wakeup_w.send(b'\0')
+        self._idle_thread.join()
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+        # Close connections still parked or queued for a worker, then stop the workers
+        for queued in (self._parked, self._connections):
+            while True:
+                try:
+                    request, _ = queued.get_nowait()
+                except queue.Empty:
+                    break
+                self.shutdown_request(request)
+        for _ in range(self.max_workers):
+            self._connections.put(None)
+    
+    def server_bind(self):
+        if hasattr(socket, 'SO_REUSEPORT'):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
 def find_available_port(start_port=3000):
     """Find an available port starting from the given port number"""
     for port in range(start_port, start_port + 100):
@@ -1365,9 +1963,23 @@ def cleanup_shutdown_flag():
         print(f"[CLEANUP] Error removing shutdown flag: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description='Zwift Workout Visualizer server')
+    parser.add_argument('--threads-http', type=int, default=None, metavar='N',
+                        help='Worker threads serving HTTP connections (default: min(64, 4 x CPUs + 16))')
+    args = parser.parse_args()
+    
+    # Configure logging once for the application (library modules only create loggers)
+    logging.basicConfig(level=logging.INFO)
+    
     port = find_available_port()
     print(f"[INFO] Using port: {port}")
     
+    # Create the Zwift workouts directory once, so /deploy does not stat or mkdir per request
+    try:
+        os.makedirs(ZWIFT_WORKOUTS_DIR, exist_ok=True)
+    except OSError as e:
+        print(f"[WARNING] Could not create workouts directory {ZWIFT_WORKOUTS_DIR}: {e}")
+    
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C
     if hasattr(signal, 'SIGTERM'):
@@ -1392,10 +2004,7 @@ def main():
     # Clear shutdown event
     shutdown_event.clear()
     
-    with socketserver.TCPServer(("0.0.0.0", port), CORSHTTPRequestHandler) as httpd:
-        # Configure socket options for better shutdown behavior
-        httpd.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        
+    with ThreadedHTTPServer(("0.0.0.0", port), CORSHTTPRequestHandler, args.threads_http) as httpd:
         print("[INFO] Zwift Workout Visualizer server running at:")
         print(f"   Local: http://localhost:{port}")
         print("   Network: https://work-1-jpkjjijvsbmtuklc.prod-runtime.all-hands.dev")
@@ -145,13 +145,49 @@ export async function deployWorkout(workoutName, zwoContent) {
   }
 }
 
+/**
+ * Read a Server-Sent Events chat stream, reporting tokens as they arrive
+ * @param {Response} response - Streaming /chat response
+ * @param {Function} onToken - Called with each token of the reply
+ * @returns {Promise<Object>} Final event carrying the full reply
+ */
+async function readChatStream(response, onToken) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const line = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      if (!line.startsWith('data: ')) {
+        continue;
+      }
+      const event = JSON.parse(line.slice(6));
+      if (event.complete) {
+        return event;
+      }
+      onToken(event.token);
+    }
+  }
+  return {};
+}
+
 /**
  * Send chat message to LLM with enhanced error handling
  * @param {string} message - Message to send
+ * @param {Function} [onToken] - Streams the reply token by token when provided
  * @returns {Promise<string>} LLM response
  * @throws {Error} If request fails or LLM returns error
  */
-export async function sendChatMessage(message) {
+export async function sendChatMessage(message, onToken) {
   if (!message || typeof message !== 'string') {
     throw new Error('Invalid message provided');
   }
@@ -166,9 +202,13 @@ export async function sendChatMessage(message) {
   }
 
   try {
+    const headers = { 'Content-Type': 'application/json' };
+    if (onToken) {
+      headers.Accept = 'text/event-stream';
+    }
     const response = await enhancedFetch('/chat', {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers,
       body: JSON.stringify({ message: trimmedMessage }),
     });
 
@@ -186,7 +226,9 @@ export async function sendChatMessage(message) {
       throw error;
     }
 
-    const data = await response.json();
+    const data = onToken
+      ? await readChatStream(response, onToken)
+      : await response.json();
 
     if (!data.reply) {
       throw new Error('No reply received from server');
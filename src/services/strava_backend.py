@@ -11,11 +11,16 @@ from typing import Dict, List, Optional
 import logging
 
 import requests
+from requests.adapters import HTTPAdapter
 from cryptography.fernet import Fernet
 
 
 logger = logging.getLogger(__name__)
 
+# Shared across calls so API requests reuse kept-alive connections and TLS sessions
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+
 
 class StravaBackendService:
     """Backend service for Strava integration"""
@@ -116,7 +121,7 @@ class StravaBackendService:
             headers['Content-Type'] = 'application/json'
         
         try:
-            response = requests.request(
+            response = _session.request(
                 method=method,
                 url=url,
                 headers=headers,
@@ -153,7 +158,7 @@ class StravaBackendService:
                 'grant_type': 'authorization_code'
             }
             
-            response = requests.post(
+            response = _session.post(
                 f"{self.oauth_base_url}/token",
                 data=data,
                 timeout=30
@@ -204,7 +209,7 @@ class StravaBackendService:
                 'grant_type': 'refresh_token'
             }
             
-            response = requests.post(
+            response = _session.post(
                 f"{self.oauth_base_url}/token",
                 data=data,
                 timeout=30
@@ -630,7 +635,7 @@ class StravaBackendService:
                 'verify_token': self.webhook_verify_token
             }
             
-            response = requests.post(
+            response = _session.post(
                 'https://www.strava.com/api/v3/push_subscriptions',
                 data=subscription_data,
                 timeout=30
@@ -656,7 +661,7 @@ class StravaBackendService:
                 'client_secret': self.client_secret
             }
             
-            response = requests.get(
+            response = _session.get(
                 'https://www.strava.com/api/v3/push_subscriptions',
                 params=params,
                 timeout=30
@@ -682,7 +687,7 @@ class StravaBackendService:
                 'client_secret': self.client_secret
             }
             
-            response = requests.delete(
+            response = _session.delete(
                 f'https://www.strava.com/api/v3/push_subscriptions/{subscription_id}',
                 params=params,
                 timeout=30
@@ -6,17 +6,22 @@ Handles TrainingPeaks OAuth2 flow, API integration, and data synchronization
 
 import os
 import time
-import json
 import hashlib
 import base64
 from typing import Dict, List, Optional
 import logging
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from cryptography.fernet import Fernet
 
 logger = logging.getLogger(__name__)
 
+# Shared across calls so API requests reuse kept-alive connections and TLS sessions
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+
 class TrainingPeaksBackendService:
     """TrainingPeaks integration backend service"""
     
@@ -81,7 +86,7 @@ class TrainingPeaksBackendService:
         self._check_rate_limit()
         
         try:
-            response = requests.request(method, url, timeout=30, **kwargs)
+            response = _session.request(method, url, timeout=30, **kwargs)
             logger.debug(f"{method} {url} -> {response.status_code}")
             return response
         except requests.RequestException as e:
@@ -90,8 +95,7 @@ class TrainingPeaksBackendService:
 
     def _encrypt_token_data(self, token_data: Dict) -> str:
         """Encrypt token data for secure storage"""
-        json_data = json.dumps(token_data)
-        encrypted = self.fernet.encrypt(json_data.encode())
+        encrypted = self.fernet.encrypt(orjson.dumps(token_data))
         return base64.b64encode(encrypted).decode()
 
     def _decrypt_token_data(self, encrypted_data: str) -> Dict:
@@ -99,7 +103,7 @@ class TrainingPeaksBackendService:
         try:
             encrypted_bytes = base64.b64decode(encrypted_data.encode())
             decrypted = self.fernet.decrypt(encrypted_bytes)
-            return json.loads(decrypted.decode())
+            return orjson.loads(decrypted)
         except Exception as e:
             logger.error(f"Token decryption failed: {e}")
             raise Exception("Invalid or corrupted token data")
@@ -1698,7 +1698,10 @@ export class UI {
         input.value = '';
 
         // Show thinking message
-        this.appendChatMessage('🤔 Creating your workout...', 'llm thinking');
+        const thinkingMessage = this.appendChatMessage(
+          '🤔 Creating your workout...',
+          'llm thinking'
+        );
 
         // Check if LLM mode is enabled
         const llmToggle = document.getElementById('llmModeToggle');
@@ -1706,7 +1709,7 @@ export class UI {
 
         if (useLLM) {
           // Use LLM generation
-          this.generateWorkoutWithLLM(message);
+          this.generateWorkoutWithLLM(message, thinkingMessage);
         } else {
           // Generate workout locally
           setTimeout(() => {
@@ -1767,7 +1770,7 @@ export class UI {
     }
   }
 
-  async generateWorkoutWithLLM(message) {
+  async generateWorkoutWithLLM(message, pendingMessage) {
     try {
       // Load instructions and create enhanced prompt
       const response = await fetch('WORKOUT_CREATION_INSTRUCTIONS.md');
@@ -1790,7 +1793,12 @@ The JSON should have this exact structure:
     "tss": calculated_tss_value
 }`;
 
-      const llmResponse = await sendChatMessage(enhancedPrompt);
+      // Stream the reply into the pending message bubble as it is generated
+      let streamed = '';
+      const llmResponse = await sendChatMessage(enhancedPrompt, token => {
+        streamed += token;
+        this.updateChatMessage(pendingMessage, streamed);
+      });
       this.removeLastChatMessage(); // Remove thinking message
 
       // Try to parse the LLM response as JSON
@@ -1890,6 +1898,15 @@ The JSON should have this exact structure:
     msgDiv.textContent = text;
     chatMessages.appendChild(msgDiv);
     chatMessages.scrollTop = chatMessages.scrollHeight;
+    return msgDiv;
+  }
+
+  updateChatMessage(msgDiv, text) {
+    if (!msgDiv) return;
+    msgDiv.classList.remove('thinking');
+    msgDiv.textContent = text;
+    const chatMessages = document.getElementById('chatMessages');
+    chatMessages.scrollTop = chatMessages.scrollHeight;
   }
 
   removeLastChatMessage() {
@@ -0,0 +1,26 @@
+"""Shared setup for the Python server tests"""
+
+import sys
+from pathlib import Path
+
+import langchain.agents
+import langchain.tools
+from langchain_core.tools import Tool
+
+# The server modules live at the repository root, and server.py imports its services from src/services
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(1, str(REPO_ROOT / 'src' / 'services'))
+
+# The server code targets the classic langchain API. langchain 1.x dropped langchain.tools.Tool (it
+# lives on in langchain_core) and moved AgentExecutor to the separate langchain_classic package.
+# Fill the gaps so the modules import; the tests drive handlers with their own fake agent.
+if not hasattr(langchain.tools, 'Tool'):
+    langchain.tools.Tool = Tool
+if not hasattr(langchain.agents, 'AgentExecutor'):
+    try:
+        from langchain_classic.agents import AgentExecutor, create_tool_calling_agent
+    except ImportError:
+        AgentExecutor = create_tool_calling_agent = None
+    langchain.agents.AgentExecutor = AgentExecutor
+    langchain.agents.create_tool_calling_agent = create_tool_calling_agent
@@ -0,0 +1,36 @@
+"""Tests for configuration loading in config/config_manager.py"""
+
+import math
+
+import pytest
+
+from config.config_manager import ConfigManager
+
+
+def test_instances_do_not_share_loaded_config():
+    first = ConfigManager('development')
+    port = first._config['server']['port']
+    first._config['server']['port'] = port + 1
+
+    assert ConfigManager('development')._config['server']['port'] == port
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('true', True),
+    ('False', False),
+    ('42', 42),
+    ('-5', -5),
+    ('1.5', 1.5),
+    ('1e5', 100000.0),
+    (' 1.5', 1.5),
+    ('1_000.5', 1000.5),
+    ('inf', math.inf),
+    ('[1, 2]', [1, 2]),
+    ('localhost', 'localhost'),
+])
+def test_convert_value(value, expected):
+    assert ConfigManager.__new__(ConfigManager)._convert_value(value) == expected
+
+
+def test_convert_value_accepts_nan():
+    assert math.isnan(ConfigManager.__new__(ConfigManager)._convert_value('nan'))
@@ -0,0 +1,220 @@
+"""Tests for health monitoring, idle handling and config caching in mcp_manager.py"""
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from conftest import REPO_ROOT
+
+import mcp_manager
+from mcp_manager import (
+    MCP_Server,
+    MCPManager,
+    ServerStatus,
+    _invoke_tool,
+    read_mcp_config,
+)
+from mcp_validator import MCPConfigValidator
+
+SCHEMA_PATH = str(REPO_ROOT / 'mcp_config_schema.json')
+
+
+def _write_config(path, port=18765, **global_settings):
+    path.write_text(json.dumps({
+        'version': '1.0.0',
+        'mcp_servers': {
+            'tool': {
+                'name': 'Tool',
+                'description': 'Test server',
+                'category': 'custom',
+                'command': 'python',
+                'args': ['server.py'],
+                'auto_start': False,
+                'connection': {'host': 'localhost', 'port': port},
+            },
+        },
+        'global_settings': global_settings,
+    }))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    config_path = tmp_path / 'mcp_config.json'
+    _write_config(config_path, auto_recovery=True)
+    manager = MCPManager(str(config_path), SCHEMA_PATH)
+    yield manager
+    manager.stop_health_monitoring()
+
+
+def test_read_mcp_config_returns_private_copies(tmp_path):
+    config_path = tmp_path / 'mcp_config.json'
+    _write_config(config_path)
+
+    read_mcp_config(str(config_path))['mcp_servers']['tool']['connection']['port'] = 1
+
+    assert read_mcp_config(str(config_path))['mcp_servers']['tool']['connection']['port'] == 18765
+
+
+def test_read_mcp_config_rereads_changed_file(tmp_path):
+    config_path = tmp_path / 'mcp_config.json'
+    _write_config(config_path)
+    read_mcp_config(str(config_path))
+
+    _write_config(config_path, port=19876)  # Different size, so a new revision even within one mtime tick
+
+    assert read_mcp_config(str(config_path))['mcp_servers']['tool']['connection']['port'] == 19876
+
+
+def test_validation_is_cached_per_revision_but_environment_is_checked_every_load(tmp_path, monkeypatch):
+    calls = {'validate': 0, 'environment': 0}
+    validate_config = MCPConfigValidator.validate_config
+    check_environment = MCPConfigValidator.check_environment
+
+    def counting_validate(self, config, check_environment=True):
+        calls['validate'] += 1
+        return validate_config(self, config, check_environment)
+
+    def counting_environment(self, config):
+        calls['environment'] += 1
+        return check_environment(self, config)
+
+    monkeypatch.setattr(MCPConfigValidator, 'validate_config', counting_validate)
+    monkeypatch.setattr(MCPConfigValidator, 'check_environment', counting_environment)
+    config_path = tmp_path / 'mcp_config.json'
+    _write_config(config_path, port=18766)
+
+    MCPManager(str(config_path), SCHEMA_PATH)
+    MCPManager(str(config_path), SCHEMA_PATH)
+    assert calls == {'validate': 1, 'environment': 2}
+
+    _write_config(config_path, port=19877)
+    MCPManager(str(config_path), SCHEMA_PATH)
+    assert calls == {'validate': 2, 'environment': 3}
+
+    # Only the latest revision's result is kept
+    key, _ = mcp_manager._last_validation
+    assert key == (mcp_manager._config_revision_key(str(config_path)), SCHEMA_PATH)
+
+
+def test_recovery_runs_while_probe_threads_are_hung(manager, monkeypatch):
+    recovered = threading.Event()
+    monkeypatch.setattr(manager, 'restart_server', lambda server_id: recovered.set() or True)
+    manager.start_health_monitoring()
+
+    # Occupy every probe thread, as list_tools calls to unresponsive servers would
+    release = threading.Event()
+    for _ in range(4):
+        manager._probe_executor.submit(release.wait)
+    try:
+        server = MCP_Server(
+            id='tool', config={'health_check': {'timeout': 0.1, 'retry_count': 1}}, client=object()
+        )
+        started = time.monotonic()
+        manager._check_server_health(server)
+        assert time.monotonic() - started < 0.05  # The monitor thread does not wait on the probe
+
+        assert recovered.wait(2)
+        assert server.health.status == ServerStatus.UNHEALTHY
+    finally:
+        release.set()
+
+
+
+def test_answered_probe_resets_failures_and_queues_the_next_check(manager):
+    manager.start_health_monitoring()
+    server = manager.servers['tool'] = MCP_Server(
+        id='tool', config={}, client=SimpleNamespace(list_tools=list)
+    )
+    manager._update_health(server, status=ServerStatus.RUNNING, failure_count=2)
+
+    manager._check_server_health(server)
+
+    deadline = time.monotonic() + 2
+    while 'tool' not in manager._scheduled_checks and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert 'tool' in manager._scheduled_checks
+    assert server.health.failure_count == 0
+
+def test_idle_stop_skips_server_used_since_the_sweep(manager, monkeypatch):
+    stopped = []
+    monkeypatch.setattr(manager, 'stop_server', lambda server_id, idle=False: stopped.append((server_id, idle)))
+    server = manager.servers['tool'] = MCP_Server(id='tool', config={})
+    manager._update_health(server, status=ServerStatus.RUNNING)
+
+    server.last_used = time.monotonic()
+    manager._stop_if_idle('tool', idle_timeout=60)
+    assert stopped == []
+
+    server.last_used = time.monotonic() - 120
+    manager._stop_if_idle('tool', idle_timeout=60)
+    assert stopped == [('tool', True)]
+
+
+def test_tool_call_cold_starts_idle_server(manager, monkeypatch):
+    started = []
+    monkeypatch.setattr(manager, 'ensure_started', started.append)
+
+    class Client:
+        def ping(self, **kwargs):
+            return 'pong'
+
+    server = manager.servers['tool'] = MCP_Server(id='tool', config={}, client=Client())
+    manager._update_health(server, status=ServerStatus.IDLE)
+
+    assert _invoke_tool(manager, server, 'ping') == 'pong'
+    assert started == ['tool']
+
+
+class BlockingClient:
+    """An MCP client whose ping calls block until released"""
+
+    def __init__(self):
+        self.called, self.release = threading.Event(), threading.Event()
+
+    def ping(self, **kwargs):
+        self.called.set()
+        self.release.wait(5)
+        return 'pong'
+
+
+def test_tool_call_waits_for_a_starting_server(manager):
+    server = manager.servers['tool'] = MCP_Server(id='tool', config={})
+    manager._update_health(server, status=ServerStatus.STARTING)
+    replies = []
+    call = threading.Thread(target=lambda: replies.append(_invoke_tool(manager, server, 'ping')))
+    call.start()
+
+    # The client is not connected yet; the call must not touch it
+    time.sleep(0.2)
+    assert call.is_alive()
+
+    client = server.client = BlockingClient()
+    client.release.set()
+    manager._update_health(server, status=ServerStatus.RUNNING)
+    call.join(5)
+    assert replies == ['pong']
+
+
+def test_idle_sweep_skips_servers_with_calls_in_flight(manager, monkeypatch):
+    stopped, submitted = [], []
+    monkeypatch.setattr(manager, 'stop_server', lambda server_id, idle=False: stopped.append(server_id))
+    monkeypatch.setattr(manager, '_maintenance_executor', SimpleNamespace(submit=lambda *args: submitted.append(args)))
+    client = BlockingClient()
+    server = manager.servers['tool'] = MCP_Server(id='tool', config={}, client=client)
+    manager._update_health(server, status=ServerStatus.RUNNING)
+
+    call = threading.Thread(target=_invoke_tool, args=(manager, server, 'ping'))
+    call.start()
+    try:
+        assert client.called.wait(5)
+        server.last_used = time.monotonic() - 120  # A long call: last used when it began
+
+        manager._run_idle_sweep()
+        manager._stop_if_idle('tool', idle_timeout=60)
+        assert submitted == [] and stopped == []
+    finally:
+        client.release.set()
+        call.join(5)
+    assert server.in_flight == 0
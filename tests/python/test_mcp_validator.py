@@ -0,0 +1,98 @@
+"""Tests for the environment checks in mcp_validator.py"""
+
+import socket
+
+import pytest
+from conftest import REPO_ROOT
+
+import mcp_validator
+from mcp_validator import MCPConfigValidator, _ports_in_use, _probe_ports
+
+
+@pytest.fixture
+def listener():
+    """A local TCP port that is accepting connections"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        yield sock.getsockname()[1]
+
+
+@pytest.fixture
+def validator():
+    return MCPConfigValidator(str(REPO_ROOT / 'mcp_config_schema.json'))
+
+
+def _config(command, port):
+    return {
+        'version': '1.0.0',
+        'mcp_servers': {
+            'tool': {
+                'name': 'Tool',
+                'description': 'Test server',
+                'category': 'custom',
+                'command': command,
+                'connection': {'host': 'localhost', 'port': port},
+            },
+        },
+        'global_settings': {},
+    }
+
+
+def test_probe_ports_finds_listener(listener):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        free_port = sock.getsockname()[1]  # Bound but not listening, so connects are refused
+
+    assert _probe_ports([listener, free_port]) == {listener}
+    assert _ports_in_use([free_port, listener]) == [listener]
+
+
+def test_check_environment_reports_missing_commands_and_busy_ports(validator, listener):
+    warnings = validator.check_environment(_config('no-such-command-xyz', listener))
+
+    assert "[tool] Command 'no-such-command-xyz' not found in PATH" in warnings
+    assert f'Port {listener} appears to be already in use' in warnings
+
+
+def test_validate_config_without_environment_checks_depends_only_on_config(validator, listener):
+    config = _config('no-such-command-xyz', listener)
+
+    static = validator.validate_config(config, check_environment=False)
+    full = validator.validate_config(config)
+
+    assert static['valid'] and full['valid']
+    assert not any('PATH' in w or 'already in use' in w for w in static['warnings'])
+    assert sorted(full['warnings']) == sorted(static['warnings'] + validator.check_environment(config))
+
+
+def test_cached_validation_checks_the_environment_on_every_call(validator, tmp_path, monkeypatch):
+    config = _config('no-such-command-xyz', 18767)
+
+    first = validator.validate_config_cached(config, cache_dir=tmp_path)
+    monkeypatch.setattr(validator, 'check_environment', lambda config: [])
+    second = validator.validate_config_cached(config, cache_dir=tmp_path)
+
+    assert "[tool] Command 'no-such-command-xyz' not found in PATH" in first['warnings']
+    assert not any('PATH' in w for w in second['warnings'])
+    assert len(list(tmp_path.iterdir())) == 1  # Second result came from the stored entry
+
+
+@pytest.mark.parametrize('command', ['rm', '/bin/rm', 'SUDO', 'format.com', 'RM.EXE'])
+def test_dangerous_commands_are_flagged_with_or_without_windows_suffix(validator, monkeypatch, command):
+    monkeypatch.setattr(mcp_validator, '_EXECUTABLE_SUFFIXES', frozenset({'.com', '.exe'}))  # As on Windows
+    result = {'valid': True, 'errors': [], 'warnings': []}
+
+    validator._validate_command({'command': command}, result, check_environment=False)
+
+    assert result['warnings'] == [f'Potentially dangerous command detected: {command}']
+
+
+@pytest.mark.parametrize('command', ['terraform', 'supabase-mcp', 'rm.py'])
+def test_commands_merely_resembling_dangerous_ones_are_not_flagged(validator, monkeypatch, command):
+    monkeypatch.setattr(mcp_validator, '_EXECUTABLE_SUFFIXES', frozenset({'.com', '.exe'}))
+    result = {'valid': True, 'errors': [], 'warnings': []}
+
+    validator._validate_command({'command': command}, result, check_environment=False)
+
+    assert result['warnings'] == []
@@ -0,0 +1,319 @@
+"""Tests for request handling in server.py"""
+
+import http.client
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pytest
+from langchain_core.agents import AgentAction
+
+import server
+
+Handler = server.CORSHTTPRequestHandler
+
+
+def _run(*tools):
+    """An agent result shaped like AgentExecutor's with return_intermediate_steps"""
+    return {
+        'output': 'done',
+        'intermediate_steps': [(AgentAction(tool=tool, tool_input={}, log=''), 'ok') for tool in tools],
+    }
+
+
+class FakeAgent:
+    """Counts invocations and answers after a delay, calling the given tools"""
+
+    def __init__(self, tools=(), delay=0.0):
+        self.tools, self.delay, self.calls = tools, delay, 0
+        self._lock = threading.Lock()
+
+    def invoke(self, inputs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return _run(*self.tools)
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    """A handler without a connection, on fresh class-level chat state"""
+    monkeypatch.setattr(Handler, '_chat_cache', OrderedDict())
+    monkeypatch.setattr(Handler, '_chat_pending', {})
+    return Handler.__new__(Handler)
+
+
+@pytest.fixture
+def workouts_dir(tmp_path, monkeypatch):
+    root = tmp_path / 'Workouts'
+    (root / 'Intervals').mkdir(parents=True)
+    (root / 'Intervals' / 'vo2.zwo').write_text('<workout_file/>')
+    (tmp_path / 'secret.txt').write_text('secret')
+    monkeypatch.setattr(server, 'ZWIFT_WORKOUTS_DIR', str(root))
+    monkeypatch.setattr(server, 'ZWIFT_WORKOUTS_REAL', os.path.realpath(root))
+    monkeypatch.setattr(Handler, '_listing_cache', {})
+    return root
+
+
+@pytest.fixture
+def http_server(workouts_dir):
+    """A server with a single worker, so any connection holding it would block the rest"""
+    httpd = server.ThreadedHTTPServer(('127.0.0.1', 0), Handler, max_workers=1)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _connect(httpd):
+    return http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=5)
+
+
+# Workout path resolution
+
+def test_resolve_workout_path_stays_inside_workouts_dir(handler, workouts_dir):
+    root = os.path.realpath(workouts_dir)
+
+    assert handler._resolve_workout_path('') == root
+    assert handler._resolve_workout_path('Intervals/vo2.zwo') == os.path.join(root, 'Intervals', 'vo2.zwo')
+    assert handler._resolve_workout_path('../secret.txt') is None
+    assert handler._resolve_workout_path('Intervals/../../secret.txt') is None
+    assert handler._resolve_workout_path(str(workouts_dir.parent / 'secret.txt')) is None
+
+
+def test_resolve_workout_path_rejects_sibling_with_shared_prefix(handler, workouts_dir):
+    (workouts_dir.parent / 'Workouts-other').mkdir()
+
+    assert handler._resolve_workout_path('../Workouts-other') is None
+
+
+def test_resolve_workout_path_rejects_symlink_out_of_workouts_dir(handler, workouts_dir):
+    (workouts_dir / 'escape').symlink_to(workouts_dir.parent)
+
+    assert handler._resolve_workout_path('escape/secret.txt') is None
+
+
+def test_workout_listing_rejects_traversal(http_server):
+    conn = _connect(http_server)
+    conn.request('GET', '/workouts/..%2F..')
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 404
+    conn.close()
+
+
+# Chat reply cache
+
+def test_only_side_effect_free_runs_are_cacheable():
+    assert server._is_cacheable_run(_run())
+    assert server._is_cacheable_run(_run('workout_creator_get_power_zones', 'workout_creator_calculate_tss'))
+    assert not server._is_cacheable_run(_run('workout_creator_get_power_zones', 'playwright_browser_click'))
+    assert not server._is_cacheable_run({'output': 'done'})  # Steps not reported
+
+
+def test_cached_reply_expires_after_ttl(handler, monkeypatch):
+    handler._cache_reply('hi', 'hello')
+    assert handler._get_cached_reply('hi') == 'hello'
+
+    monkeypatch.setattr(Handler, 'CHAT_CACHE_TTL', 0)
+    handler._cache_reply('hi', 'hello')
+    assert handler._get_cached_reply('hi') is None
+    assert 'hi' not in Handler._chat_cache
+
+
+def test_chat_cache_evicts_least_recently_used(handler, monkeypatch):
+    monkeypatch.setattr(Handler, 'CHAT_CACHE_SIZE', 2)
+    handler._cache_reply('a', 'A')
+    handler._cache_reply('b', 'B')
+    handler._get_cached_reply('a')
+    handler._cache_reply('c', 'C')
+
+    assert list(Handler._chat_cache) == ['a', 'c']
+
+
+def test_first_turn_with_side_effects_is_not_cached(handler, monkeypatch):
+    monkeypatch.setattr(Handler, 'agent_executor', FakeAgent(tools=('playwright_browser_click',)))
+
+    handler._invoke_first_turn('click it')
+
+    assert handler._get_cached_reply('click it') is None
+
+
+def test_read_only_first_turn_is_cached(handler, monkeypatch):
+    monkeypatch.setattr(Handler, 'agent_executor', FakeAgent(tools=('workout_creator_get_power_zones',)))
+
+    handler._invoke_first_turn('zones for 250W')
+
+    assert handler._get_cached_reply('zones for 250W') == 'done'
+
+
+# Coalescing of identical first-turn messages
+
+def _invoke_concurrently(handler, message, count):
+    replies = []
+    threads = [threading.Thread(target=lambda: replies.append(handler._invoke_first_turn(message)))
+               for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return replies
+
+
+def test_identical_read_only_messages_share_one_agent_call(handler, monkeypatch):
+    agent = FakeAgent(tools=('workout_creator_get_power_zones',), delay=0.3)
+    monkeypatch.setattr(Handler, 'agent_executor', agent)
+
+    replies = _invoke_concurrently(handler, 'zones for 250W', 5)
+
+    assert replies == ['done'] * 5
+    assert agent.calls == 1
+    assert handler._get_cached_reply('zones for 250W') == 'done'
+    assert Handler._chat_pending == {}
+
+
+def test_identical_messages_with_side_effects_each_run_the_agent(handler, monkeypatch):
+    agent = FakeAgent(tools=('playwright_browser_click',), delay=0.3)
+    monkeypatch.setattr(Handler, 'agent_executor', agent)
+
+    replies = _invoke_concurrently(handler, 'click it', 5)
+
+    assert replies == ['done'] * 5
+    assert agent.calls == 5
+
+
+def test_followers_stop_waiting_on_a_stuck_leader(handler, monkeypatch):
+    agent = FakeAgent(delay=1.0)
+    monkeypatch.setattr(Handler, 'agent_executor', agent)
+    monkeypatch.setattr(Handler, 'CHAT_COALESCE_TIMEOUT', 0.1)
+
+    leader = threading.Thread(target=handler._invoke_first_turn, args=('slow',))
+    leader.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    assert handler._invoke_first_turn('slow') == 'done'
+    leader.join()
+
+    assert agent.calls == 2
+    assert time.monotonic() - started < 1.5  # Waited 0.1s, then ran alongside the leader
+
+
+# Workout listing cache
+
+def test_workout_listing_revalidates_with_etag(http_server, workouts_dir):
+    conn = _connect(http_server)
+    conn.request('GET', '/workouts/Intervals')
+    response = conn.getresponse()
+    assert response.status == 200
+    assert b'vo2.zwo' in response.read()
+    etag = response.getheader('ETag')
+
+    conn.request('GET', '/workouts/Intervals', headers={'If-None-Match': etag})
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 304
+
+    (workouts_dir / 'Intervals' / 'sweet-spot.zwo').write_text('<workout_file/>')
+    stat = (workouts_dir / 'Intervals').stat()
+    os.utime(workouts_dir / 'Intervals', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    conn.request('GET', '/workouts/Intervals', headers={'If-None-Match': etag})
+    response = conn.getresponse()
+    assert response.status == 200
+    assert b'sweet-spot.zwo' in response.read()
+    conn.close()
+
+
+
+def test_workout_listing_changed_during_scan_is_not_cached(http_server, workouts_dir, monkeypatch):
+    scandir = os.scandir
+    folder = workouts_dir / 'Intervals'
+
+    def scandir_then_change(path):
+        entries = scandir(path)
+        (folder / 'sweet-spot.zwo').write_text('<workout_file/>')
+        stat = folder.stat()
+        os.utime(folder, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        return entries
+
+    monkeypatch.setattr(os, 'scandir', scandir_then_change)
+    conn = _connect(http_server)
+    conn.request('GET', '/workouts/Intervals')
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 200
+    assert response.getheader('ETag') is None
+    assert Handler._listing_cache == {}
+    monkeypatch.setattr(os, 'scandir', scandir)
+
+    conn.request('GET', '/workouts/Intervals')
+    response = conn.getresponse()
+    assert b'sweet-spot.zwo' in response.read()
+    conn.close()
+
+# Connection handling
+
+def test_idle_keep_alive_connections_do_not_hold_workers(http_server):
+    idle = _connect(http_server)
+    idle.request('GET', '/workouts')
+    idle.getresponse().read()
+
+    # The only worker must be free for another client while the first connection sits idle
+    other = _connect(http_server)
+    started = time.monotonic()
+    other.request('GET', '/workouts')
+    assert other.getresponse().status == 200
+    assert time.monotonic() - started < 2
+    other.close()
+
+    # The parked connection is still usable
+    idle.request('GET', '/workouts/Intervals')
+    response = idle.getresponse()
+    assert response.status == 200
+    response.read()
+    idle.close()
+
+
+def test_server_close_closes_parked_connections(workouts_dir):
+    httpd = server.ThreadedHTTPServer(('127.0.0.1', 0), Handler, max_workers=1)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    conn = _connect(httpd)
+    conn.request('GET', '/workouts')
+    conn.getresponse().read()
+
+    httpd.shutdown()
+    httpd.server_close()
+
+    assert conn.sock.recv(1) == b''
+
+
+# Request bodies
+
+@pytest.mark.parametrize('method, path', [
+    ('POST', '/api/strava/token'),
+    ('PUT', '/api/strava/settings/athlete-1'),
+    ('POST', '/api/strava/webhook'),
+])
+def test_oversized_strava_bodies_are_rejected_unread(http_server, method, path):
+    conn = _connect(http_server)
+    conn.putrequest(method, path)
+    conn.putheader('Content-Type', 'application/json')
+    conn.putheader('Content-Length', str(Handler.MAX_JSON_BODY + 1))
+    conn.endheaders()  # No body sent: the handler must answer without waiting for it
+
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 413
+    conn.close()
+
+
+# Workout deployment
+
+def test_write_text_recreates_a_missing_directory(tmp_path):
+    path = tmp_path / 'Workouts' / 'vo2.zwo'
+
+    server._write_text(str(path), '<workout_file/>')
+    server._write_text(str(path), '<workout_file></workout_file>')
+
+    assert path.read_text() == '<workout_file></workout_file>'
+